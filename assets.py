@@ -0,0 +1,10 @@
+from functools import lru_cache
+from pathlib import Path
+
+ASSET_DIR = Path(__file__).resolve().parent
+
+
+@lru_cache(maxsize=None)
+def read_asset(name):
+    """Statisch bestand (logo, handleiding) één keer per proces inlezen; gedeeld door alle sessies."""
+    return (ASSET_DIR / name).read_bytes()
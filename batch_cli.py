@@ -0,0 +1,89 @@
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from co2_engine import RESULTAAT_KOLOMMEN, default_factors, load_factor_workbook, rows_from_consumption, unit_conflicts, workbook_consumption
+from exports import format_for_path, open_writer
+from streaming_reader import stream_consumption
+from workbook_cache import parse_workbook, read_bytes
+
+
+def process_workbook(path, factors, choices, streaming=False):
+    # Parallel per bestand; binnen een bestand sequentieel om de cores niet te overboeken
+    if streaming:
+        consumptions = stream_consumption(path, workers=1)
+    else:
+        consumptions = workbook_consumption(parse_workbook(read_bytes(path), workers=1), workers=1)
+    for melding in unit_conflicts(consumptions, factors):
+        print(f"{Path(path).name}: {melding}", file=sys.stderr)
+    rows = rows_from_consumption(consumptions, factors, choices.get(Path(path).name, {}))
+    for row in rows:
+        row['Bestand'] = Path(path).name
+    return rows
+
+
+def load_factors(path):
+    factors = default_factors()
+    if path is None:
+        return factors
+    if str(path).lower().endswith('.json'):
+        with open(path, encoding='utf-8') as fh:
+            data = json.load(fh)
+        for key in factors:
+            if key in data:
+                factors[key] = data[key]
+        return factors
+    # Alleen in het geheugen: de index op schijf is de startindex van de app
+    return load_factor_workbook(path, factors, save=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bereken de CO₂-footprint van alle Excelbestanden in een map.")
+    parser.add_argument("map", help="Map met .xlsx-bestanden")
+    parser.add_argument("-o", "--output", default="CO2_resultaten.xlsx", help="Resultaatbestand (.xlsx, .csv of .parquet)")
+    parser.add_argument("-f", "--factoren", help="Emissiefactoren: .json (zelfde opbouw als de Opties-pagina) of de factor-workbook")
+    parser.add_argument("-k", "--keuzes", help="JSON met per bestand per tabblad de keuze, bv. {\"site.xlsx\": {\"Verlichting\": \"Grijs\"}}")
+    parser.add_argument("-s", "--streaming", action="store_true", help="Bestanden rij voor rij inlezen (begrensd geheugengebruik)")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count(), help="Aantal processen (standaard: alle cores)")
+    args = parser.parse_args(argv)
+
+    paths = sorted(p for p in Path(args.map).glob("*.xlsx") if not p.name.startswith("~$"))
+    if not paths:
+        print(f"Geen .xlsx-bestanden gevonden in {args.map}", file=sys.stderr)
+        return 1
+
+    factors = load_factors(args.factoren)
+    choices = {}
+    if args.keuzes:
+        with open(args.keuzes, encoding='utf-8') as fh:
+            choices = json.load(fh)
+
+    columns = ['Bestand'] + RESULTAAT_KOLOMMEN
+    writer = open_writer(args.output, format_for_path(args.output), columns)
+    n_rows = 0
+    failed = 0
+    with ProcessPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        futures = [pool.submit(process_workbook, str(p), factors, choices, args.streaming) for p in paths]
+        # Resultaten in de volgorde van de bestanden wegschrijven, per bestand één chunk
+        for path, fut in zip(paths, futures):
+            try:
+                rows = fut.result()
+            except Exception as e:
+                failed += 1
+                print(f"Fout bij {path.name}: {e}", file=sys.stderr)
+                continue
+            writer.write(pd.DataFrame(rows, columns=columns))
+            n_rows += len(rows)
+    writer.close()
+
+    print(f"{len(paths) - failed} van {len(paths)} bestanden verwerkt, {n_rows} regels naar {args.output}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,229 @@
+"""Herhaalbare benchmarks voor inlezen, footprint, visualisatie-aggregatie en export.
+
+Per werkmap controleert de benchmark ook dat de snelle paden dezelfde resultaatregels geven:
+parallel vs. sequentieel inlezen en de vectoriële brandstofclassificatie vs. de oorspronkelijke
+lus per label exact, streaming vs. in het geheugen op afronding na.
+
+    python -m benchmarks.run                          # standaardmatrix, vergelijk met baseline
+    python -m benchmarks.run --sizes 1000x5,100000x20 --repeat 3
+    python -m benchmarks.run --save-baseline          # huidige meting als nieuwe baseline
+"""
+import argparse
+import json
+import math
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import pandas as pd
+
+import exports
+import intensity
+import streaming_reader
+from benchmarks.synthetic import write_intensity, write_workbook
+from co2_engine import RESULTAAT_KOLOMMEN, default_factors, rows_from_consumption, sheet_kind, total_footprint, workbook_consumption
+from exports import FORMATS
+from fuel_classifier import classifier
+from results_model import ResultsModel
+from scenarios import ScenarioModel, bands
+from visualisaties import workbook_summaries
+from workbook_cache import parse_workbook, read_bytes
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+DEFAULT_SIZES = "1000x5,50000x20,200000x50"
+SCENARIOS = 10000
+
+
+def _factors():
+    # Vaste, niet-nul factoren zodat footprints vergelijkbaar zijn tussen runs
+    factors = default_factors()
+    factors["factor_index"] = None
+    factors["emission_factors"] = {"kWh": {"groen": 0.012, "grijs": 0.456}, "m³": {"groen": 0.89, "grijs": 1.79}}
+    factors["brandstof_factors"] = {"benzine": 2.78, "diesel": 3.26, "lpg": 1.80}
+    return factors
+
+
+def measure(fn, repeat):
+    """Snelste tijd over `repeat` runs en de piek van het Python-geheugen (MB) tijdens één run."""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, {"seconds": round(best, 4), "peak_mb": round(peak / 2**20, 2)}
+
+
+def run_case(rows, tabs, repeat, workdir):
+    path = Path(workdir) / f"synthetisch_{rows}x{tabs}.xlsx"
+    write_workbook(path, rows, tabs)
+    data = read_bytes(path)
+    factors = _factors()
+    stages = {}
+
+    # Eén worker: tracemalloc ziet geen geheugen in worker-processen
+    sheets, stages["parse"] = measure(lambda: parse_workbook(data, workers=1), repeat)
+    # Streaming zonder cache: elke run leest het bestand opnieuw
+    _, stages["parse_streaming"] = measure(lambda: _stream_uncached(data), repeat)
+    rows_out, stages["footprint"] = measure(lambda: rows_from_consumption(workbook_consumption(sheets, workers=1), factors), repeat)
+    # Visualisaties leest uit het ResultsModel: alleen tabel + top-N, geen tweede aggregatie
+    consumptions = workbook_consumption(sheets, workers=1)
+    _, stages["visualisatie"] = measure(lambda: workbook_summaries(ResultsModel(consumptions, factors, {})), repeat)
+    _, stages["scenarios"] = measure(lambda: _scenarios(consumptions, factors), repeat)
+
+    dfout = pd.DataFrame(rows_out)
+    for fmt in FORMATS:
+        _, stages[f"export_{fmt}"] = measure(lambda fmt=fmt: _export_uncached(dfout, fmt), repeat)
+
+    return {
+        "rows": rows,
+        "tabs": tabs,
+        "result_rows": len(rows_out),
+        "total_footprint": round(float(total_footprint(rows_out)), 6),
+        "checks": run_checks(data, sheets, rows_out, factors),
+        "stages": stages,
+    }
+
+
+def _stream_uncached(data, workers=1):
+    # stream_consumption zelf cachet niet; elke run leest het bestand opnieuw
+    return streaming_reader.stream_consumption(data, workers=workers)
+
+
+def _reference_vervoer_rows(df, factors):
+    # De oorspronkelijke lus per brandstoflabel uit main.py, als referentie voor de classificatie
+    rows = []
+    for bt in df['Brandstof'].dropna().unique():
+        sub = df[df['Brandstof'] == bt]
+        verbruik = pd.to_numeric(sub['Brandstof p/j'], errors='coerce').sum()
+        bt_lc = bt.lower()
+        if any(k in bt_lc for k in ['elektrisch', 'elektriciteit', 'ev']):
+            fact, een, name = factors["elekfactor"], 'kWh', "Vervoer-E"
+        elif 'hybride' in bt_lc:
+            fact, een, name = factors["brandstof_factors"].get('benzine', 0.0), 'L', "Vervoer-Hybride"
+        else:
+            fact, een, name = factors["brandstof_factors"].get(bt_lc.split()[0], 0.0), 'L', f"Vervoer-{bt}"
+        rows.append({'Onderdeel': name, 'Eenheid': een, 'Emissiefactor': fact, 'Verbruik': verbruik, 'Footprint': verbruik * fact})
+    return rows
+
+
+def _rows_close(a, b, rel=1e-9):
+    # Streaming telt per chunk op: zelfde regels, getallen op afronding na gelijk
+    return len(a) == len(b) and all(
+        x.keys() == y.keys() and all(
+            math.isclose(x[k], y[k], rel_tol=rel) if isinstance(x[k], float) else x[k] == y[k] for k in x
+        )
+        for x, y in zip(a, b)
+    )
+
+
+def run_checks(data, sheets, rows_out, factors):
+    """Gelijkheid van de resultaatregels langs de snelle paden (True = gelijk); exact, behalve streaming."""
+    def rows(consumptions):
+        return rows_from_consumption(consumptions, factors)
+
+    streamed = rows(_stream_uncached(data, workers=1))
+    vervoer = [df for df in sheets.values() if sheet_kind(df) == 'vervoer']
+    return {
+        "parallel_gelijk": rows(workbook_consumption(parse_workbook(data, workers=2), workers=2)) == rows_out,
+        "parallel_streaming_gelijk": rows(_stream_uncached(data, workers=2)) == streamed,
+        "streaming_gelijk": _rows_close(streamed, rows_out),
+        "classificatie_gelijk": all(
+            classifier.aggregate(df, factors)[RESULTAAT_KOLOMMEN].to_dict('records') == _reference_vervoer_rows(df, factors)
+            for df in vervoer
+        ),
+    }
+
+
+def _scenarios(consumptions, factors, n=SCENARIOS):
+    model = ScenarioModel(consumptions, factors, {})
+    samples = model.sample(model.ranges(10), n, seed=0)
+    return bands(model.evaluate(samples)), bands(model.evaluate_sheets(samples))
+
+
+def _export_uncached(df, fmt):
+    exports._exports.clear()
+    return exports.export_bytes(df, fmt)
+
+
+def run_intensity(rows, repeat, workdir):
+    path = Path(workdir) / f"intensiteit_{rows}.xlsx"
+    write_intensity(path, rows)
+    raw, parse = measure(lambda: pd.read_excel(path), repeat)
+    clean, prepare = measure(lambda: intensity.clean_series(raw, intensity.find_columns(raw)), repeat)
+    _, downsample = measure(lambda: intensity.downsample(clean, 'CO2_Intensiteit'), repeat)
+    return {"rows": rows, "stages": {"parse": parse, "prepare": prepare, "downsample": downsample}}
+
+
+def compare(results, baseline, tolerance):
+    """Drukt per stap de verhouding t.o.v. de baseline af; geeft het aantal regressies terug."""
+    regressions = 0
+    for case, result in results.items():
+        for check, ok in result.get("checks", {}).items():
+            if not ok:
+                print(f"{case}: CONTROLE MISLUKT {check}")
+                regressions += 1
+        base = baseline.get(case)
+        if base is None:
+            print(f"{case}: geen baseline")
+            continue
+        if "total_footprint" in base and abs(base["total_footprint"] - result["total_footprint"]) > 1e-6 * max(1.0, abs(base["total_footprint"])):
+            print(f"{case}: UITKOMST GEWIJZIGD {base['total_footprint']} -> {result['total_footprint']}")
+            regressions += 1
+        for stage, m in result["stages"].items():
+            b = base["stages"].get(stage)
+            if not b:
+                continue
+            ratio = m["seconds"] / b["seconds"] if b["seconds"] else float("inf")
+            flag = "  REGRESSIE" if ratio > 1 + tolerance else ""
+            regressions += bool(flag)
+            print(f"{case:>20} {stage:<18} {b['seconds']:>9.4f}s -> {m['seconds']:>9.4f}s  x{ratio:5.2f}  "
+                  f"{b['peak_mb']:>8.1f}MB -> {m['peak_mb']:>8.1f}MB{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks voor de CO₂ Calculator.")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Lijst van rijenxtabbladen, bv. 1000x5,100000x20")
+    parser.add_argument("--intensity-rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Toegestane vertraging t.o.v. de baseline (0.2 = 20%%)")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--output", type=Path, help="Resultaten ook als JSON wegschrijven")
+    args = parser.parse_args(argv)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in args.sizes.split(","):
+            rows, tabs = (int(x) for x in size.lower().split("x"))
+            print(f"workbook {rows} rijen / {tabs} tabbladen ...", file=sys.stderr)
+            results[f"{rows}x{tabs}"] = run_case(rows, tabs, args.repeat, workdir)
+        if args.intensity_rows:
+            results[f"intensiteit_{args.intensity_rows}"] = run_intensity(args.intensity_rows, args.repeat, workdir)
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+    failed = [f"{case}: {check}" for case, r in results.items() for check, ok in r.get("checks", {}).items() if not ok]
+    if args.save_baseline:
+        if failed:
+            print("Controles mislukt, geen baseline opgeslagen: " + ", ".join(failed), file=sys.stderr)
+            return 1
+        args.baseline.write_text(json.dumps(results, indent=2))
+        print(f"Baseline opgeslagen in {args.baseline}")
+        return 0
+    if not args.baseline.exists():
+        print(json.dumps(results, indent=2))
+        print("Geen baseline gevonden; maak er een met --save-baseline", file=sys.stderr)
+        return 0
+    return 1 if compare(results, json.loads(args.baseline.read_text()), args.tolerance) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
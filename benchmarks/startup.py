@@ -0,0 +1,110 @@
+"""Koude start en rerun-tijd van main.py per pagina, via Streamlit's AppTest in een vers proces.
+
+    python -m benchmarks.startup                    # huidige werkmap
+    python -m benchmarks.startup --compare HEAD~1   # voor/na: ook een eerdere git-revisie meten
+    python -m benchmarks.startup --compare REV~1 --rev REV   # voor/na van precies één commit
+
+Heeft de eerdere revisie andere requirements (bv. matplotlib), geef dan met --python een
+interpreter van een omgeving waarin die wel geïnstalleerd zijn.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+from io import BytesIO
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parent.parent
+PAGES = ["Opties", "CO₂ Calculator", "Visualisaties"]
+
+# Draait in een apart proces zodat imports echt koud zijn
+CHILD = r"""
+import json, sys, time
+t0 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+t_streamlit = time.perf_counter() - t0
+
+def plotly_modules():
+    return {m for m in sys.modules if m == "plotly" or m.startswith("plotly.")}
+
+# Streamlit laadt zelf al een deel van plotly; alleen wat de app daarbovenop laadt telt
+plotly_streamlit = plotly_modules()
+at = AppTest.from_file("main.py", default_timeout=120)
+t1 = time.perf_counter()
+at.run()
+cold = time.perf_counter() - t1
+if at.exception:
+    sys.exit("main.py faalt op de Opties-pagina: " + at.exception[0].value)
+result = {
+    "streamlit_import_s": t_streamlit,
+    "cold_start_s": cold,
+    "plotly_express_loaded_on_opties": "plotly.express" in sys.modules,
+    "plotly_modules_by_app_on_opties": len(plotly_modules() - plotly_streamlit),
+    "matplotlib_loaded": "matplotlib.pyplot" in sys.modules,
+    "rerun_s": {},
+}
+for page in json.loads(sys.argv[1]):
+    at.sidebar.selectbox[0].set_value(page)
+    at.run()
+    t2 = time.perf_counter()
+    at.run()
+    result["rerun_s"][page] = time.perf_counter() - t2
+print(json.dumps(result))
+"""
+
+
+def measure(workdir, runs, python=sys.executable):
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run([python, "-c", CHILD, json.dumps(PAGES)], cwd=workdir, capture_output=True, text=True)
+        if out.returncode != 0:
+            sys.stderr.write(out.stderr)
+            raise SystemExit(f"Meting in {workdir} mislukt (exitcode {out.returncode}); zie de uitvoer hierboven.")
+        samples.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    median = lambda key: statistics.median(s[key] for s in samples)
+    return {
+        "streamlit_import_s": round(median("streamlit_import_s"), 3),
+        "cold_start_s": round(median("cold_start_s"), 3),
+        "plotly_express_loaded_on_opties": samples[-1]["plotly_express_loaded_on_opties"],
+        "plotly_modules_by_app_on_opties": samples[-1]["plotly_modules_by_app_on_opties"],
+        "matplotlib_loaded": samples[-1]["matplotlib_loaded"],
+        "rerun_s": {p: round(statistics.median(s["rerun_s"][p] for s in samples), 4) for p in PAGES},
+    }
+
+
+def checkout(rev, target):
+    archive = subprocess.run(["git", "archive", rev], cwd=REPO, capture_output=True, check=True).stdout
+    with tarfile.open(fileobj=BytesIO(archive)) as tar:
+        tar.extractall(target)
+    return target
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Meet opstart- en reruntijd van de app.")
+    parser.add_argument("--runs", type=int, default=5, help="Aantal verse processen per meting (mediaan)")
+    parser.add_argument("--compare", metavar="REV", help="Git-revisie om als 'voor' te meten")
+    parser.add_argument("--rev", help="Git-revisie om als 'na' te meten (standaard de werkmap)")
+    parser.add_argument("-o", "--output", help="Resultaten ook als JSON naar dit bestand schrijven")
+    parser.add_argument("--python", default=sys.executable, help="Interpreter voor de 'voor'-meting (omgeving met de requirements van REV)")
+    args = parser.parse_args(argv)
+
+    results = {}
+    if args.compare:
+        with tempfile.TemporaryDirectory() as tmp:
+            results[f"voor ({args.compare})"] = measure(checkout(args.compare, tmp), args.runs, args.python)
+    if args.rev:
+        with tempfile.TemporaryDirectory() as tmp:
+            results[f"na ({args.rev})"] = measure(checkout(args.rev, tmp), args.runs, args.python)
+    else:
+        results["na (werkmap)"] = measure(REPO, args.runs)
+    text = json.dumps(results, indent=2, ensure_ascii=False)
+    print(text)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
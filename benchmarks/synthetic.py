@@ -0,0 +1,107 @@
+"""Synthetische werkmappen in de formaten die main.py herkent, voor benchmarks.
+
+    python -m benchmarks.synthetic site.xlsx --rows 100000 --tabs 20
+    python -m benchmarks.synthetic intensiteit.xlsx --intensity --rows 5000
+"""
+import argparse
+
+import numpy as np
+from openpyxl import Workbook
+
+MIN_ROWS, MAX_ROWS = 10, 1_000_000
+MIN_TABS, MAX_TABS = 1, 200
+
+MERKEN = ['Makita', 'Volvo', 'DAF', 'Toyota', 'Ford', 'Tesla', 'Bosch', 'Hilti', 'Atlas Copco', 'Caterpillar']
+TYPES = ['A1', 'B20', 'XC40', 'Transit', 'Model 3', 'GSR18', 'TE30', 'XAS 58', '320D', 'Corolla']
+# Realistische spreiding van labels, inclusief varianten die de classificatie moet herkennen
+BRANDSTOFFEN = ['Diesel', 'Benzine', 'Elektrisch', 'Hybride', 'LPG', 'Diesel Euro 6', 'Benzine E10', 'CNG', 'Plug-in hybride']
+BRANDSTOF_GEWICHTEN = [0.35, 0.2, 0.15, 0.1, 0.05, 0.06, 0.04, 0.03, 0.02]
+EENHEDEN = ['kWh', 'm³', 'L']
+
+
+def _check(rows, tabs):
+    if not MIN_ROWS <= rows <= MAX_ROWS:
+        raise ValueError(f"rows moet tussen {MIN_ROWS} en {MAX_ROWS} liggen")
+    if not MIN_TABS <= tabs <= MAX_TABS:
+        raise ValueError(f"tabs moet tussen {MIN_TABS} en {MAX_TABS} liggen")
+
+
+def _split(total, parts):
+    base, rest = divmod(total, parts)
+    return [base + (1 if i < rest else 0) for i in range(parts)]
+
+
+def transport_rows(n, rng):
+    merk = rng.choice(MERKEN, n)
+    typ = rng.choice(TYPES, n)
+    brandstof = rng.choice(BRANDSTOFFEN, n, p=BRANDSTOF_GEWICHTEN)
+    verbruik = np.round(rng.gamma(2.0, 900.0, n), 1)
+    # Een klein deel ontbrekende of tekstuele waarden, zoals in echte exports
+    leeg = rng.random(n) < 0.01
+    for i in range(n):
+        yield [merk[i], typ[i], brandstof[i], None if leeg[i] else float(verbruik[i])]
+
+
+def equipment_rows(n, rng, eenheid):
+    merk = rng.choice(MERKEN, n)
+    typ = rng.choice(TYPES, n)
+    aantal = rng.integers(1, 25, n)
+    vermogen = np.round(rng.uniform(0.05, 15.0, n), 3)
+    uren = rng.integers(50, 4000, n)
+    for i in range(n):
+        yield [merk[i], typ[i], int(aantal[i]), float(vermogen[i]), eenheid, int(uren[i])]
+
+
+def write_workbook(path, rows=1000, tabs=5, seed=0, transport_share=0.3):
+    """Schrijft een werkmap met `tabs` tabbladen en in totaal `rows` datarijen."""
+    _check(rows, tabs)
+    rng = np.random.default_rng(seed)
+    wb = Workbook(write_only=True)
+    n_transport = max(1, round(tabs * transport_share)) if tabs > 1 else 1
+    for i, n in enumerate(_split(rows, tabs)):
+        if i < n_transport:
+            ws = wb.create_sheet(f"Vervoer {i + 1}")
+            ws.append(['Merk', 'Type', 'Brandstof', 'Brandstof p/j'])
+            for row in transport_rows(n, rng):
+                ws.append(row)
+        else:
+            eenheid = EENHEDEN[i % len(EENHEDEN)]
+            ws = wb.create_sheet(f"Apparaten {i + 1}")
+            ws.append(['Merk', 'Type', 'Aantal', 'Vermogen', 'Eenheid', 'Draaiuren p/j'])
+            for row in equipment_rows(n, rng, eenheid):
+                ws.append(row)
+    wb.save(path)
+    return path
+
+
+def write_intensity(path, rows=20, seed=0, start_year=2000):
+    """CO₂-intensiteitsbestand met Jaar, Omzet (miljoenen) en Co2-Footprint (ton)."""
+    _check(rows, 1)
+    rng = np.random.default_rng(seed)
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Intensiteit")
+    ws.append(['Jaar', 'Omzet (miljoenen)', 'Co2-Footprint (ton)'])
+    omzet = 50 * np.cumprod(1 + rng.normal(0.03, 0.02, rows))
+    co2 = 400 * np.cumprod(1 + rng.normal(-0.01, 0.03, rows))
+    for i in range(rows):
+        ws.append([start_year + i, round(float(omzet[i]), 2), round(float(co2[i]), 2)])
+    wb.save(path)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genereer een synthetische werkmap.")
+    parser.add_argument("pad")
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--tabs", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--intensity", action="store_true", help="Intensiteitsbestand (Jaar/Omzet/CO₂) in plaats van een site-werkmap")
+    args = parser.parse_args(argv)
+    if args.intensity:
+        write_intensity(args.pad, args.rows, args.seed)
+    else:
+        write_workbook(args.pad, args.rows, args.tabs, args.seed)
+
+
+if __name__ == "__main__":
+    main()
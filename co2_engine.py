@@ -0,0 +1,196 @@
+import copy
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+from factor_index import apply_to_factors, compile_index, load_index
+from fuel_classifier import classifier
+from worker_pool import map_ordered
+
+# Kolommen waaraan een tabblad herkend wordt
+VERVOER_KOLOMMEN = ['Brandstof', 'Brandstof p/j']
+APPARATEN_KOLOMMEN = ['Aantal', 'Vermogen', 'Eenheid', 'Draaiuren p/j']
+RESULTAAT_KOLOMMEN = ['Onderdeel', 'Eenheid', 'Emissiefactor', 'Verbruik', 'Footprint']
+# Aantal regels per tabblad met het hoogste verbruik dat bewaard blijft (Visualisaties)
+TOP_ROWS = 5
+
+DEFAULT_FACTORS = {
+    "emission_factors": {"kWh": {"groen": 0.0, "grijs": 0.0}, "m³": {"groen": 0.0, "grijs": 0.0}},
+    "elekfactor": 0.078,
+    "brandstof_factors": {"benzine": 0.0, "diesel": 0.0, "lpg": 0.0},
+}
+
+def default_factors():
+    factors = copy.deepcopy(DEFAULT_FACTORS)
+    factors["factor_index"] = load_index()
+    return factors
+
+
+def factors_from_state(state):
+    return {
+        "emission_factors": state.emission_factors,
+        "elekfactor": state.elekfactor,
+        "brandstof_factors": state.brandstof_factors,
+        # Volledige factorsheet, voor brandstoflabels buiten benzine/diesel/lpg; per sessie
+        "factor_index": state.get("factor_index"),
+    }
+
+
+def load_factor_workbook(source, factors, save=True):
+    """Vult `factors` aan vanuit de emissiefactoren-workbook (koppen vanaf rij 5)."""
+    index = compile_index(source, save=save)
+    factors["factor_index"] = index
+    return apply_to_factors(index, factors)
+
+
+def kind_for_columns(columns):
+    if all(c in columns for c in VERVOER_KOLOMMEN):
+        return 'vervoer'
+    if all(c in columns for c in APPARATEN_KOLOMMEN):
+        return 'apparaten'
+    return None
+
+
+def sheet_kind(df):
+    return kind_for_columns(df.columns)
+
+
+def sheet_unit(df):
+    eenheden = df['Eenheid'].dropna()
+    return eenheden.iloc[0] if not eenheden.empty else None
+
+
+@dataclass
+class SheetConsumption:
+    """Verbruik van één tabblad, los van de emissiefactoren."""
+    sheet: str
+    kind: str
+    unit: object = None
+    verbruik: float = 0.0
+    # Alleen voor vervoer: verbruik per brandstoflabel
+    labels: list = field(default_factory=list)
+    label_verbruik: list = field(default_factory=list)
+    # Regels met het hoogste verbruik: Merk, Type, (Brandstof,) Verbruik
+    top: object = None
+    # Aantal ingelezen rijen (zonder kop)
+    rows: int = 0
+
+    @property
+    def total_verbruik(self):
+        return sum(self.label_verbruik) if self.kind == 'vervoer' else self.verbruik
+
+
+def row_verbruik(df, kind):
+    """Verbruik per regel zoals de calculator het optelt; NaN voor regels die niet meetellen."""
+    if kind == 'vervoer':
+        return pd.to_numeric(df['Brandstof p/j'], errors='coerce').where(df['Brandstof'].notna())
+    return pd.to_numeric(df['Aantal'], errors='coerce') * pd.to_numeric(df['Vermogen'], errors='coerce') * pd.to_numeric(df['Draaiuren p/j'], errors='coerce')
+
+
+def top_rows(df, kind, n=TOP_ROWS, verbruik=None):
+    """De `n` regels van `df` met het hoogste verbruik, met Merk en Type ('Onbekend' als de kolom ontbreekt)."""
+    if verbruik is None:
+        verbruik = row_verbruik(df, kind)
+    top = verbruik.reset_index(drop=True).nlargest(n)
+    columns = ['Merk', 'Type'] + (['Brandstof'] if kind == 'vervoer' else [])
+    out = pd.DataFrame(
+        {col: df[col].iloc[top.index].to_numpy() if col in df.columns else 'Onbekend' for col in columns},
+        index=pd.RangeIndex(len(top)),
+    )
+    out['Verbruik'] = top.to_numpy()
+    return out
+
+
+def merge_top(a, b, n=TOP_ROWS):
+    # Bij gelijke waarden wint de eerdere regel, net als bij nlargest over het hele tabblad
+    if a is None:
+        return b
+    return pd.concat([a, b], ignore_index=True).nlargest(n, 'Verbruik').reset_index(drop=True)
+
+
+def sheet_consumption(sheet, df):
+    kind = sheet_kind(df)
+    if kind == 'vervoer':
+        labels, sums = classifier.label_totals(df)
+        return SheetConsumption(sheet, kind, labels=labels, label_verbruik=sums, top=top_rows(df, kind), rows=len(df))
+    if kind == 'apparaten':
+        verbruik = row_verbruik(df, kind)
+        return SheetConsumption(sheet, kind, unit=sheet_unit(df), verbruik=verbruik.sum(), top=top_rows(df, kind, verbruik=verbruik), rows=len(df))
+    return None
+
+
+def choice_options(unit, factors):
+    # Keuzes die de gebruiker per apparaten-tabblad kan maken
+    if unit in factors["emission_factors"]:
+        return ['Groen', 'Grijs']
+    if unit == 'L':
+        return list(factors["brandstof_factors"].keys())
+    return []
+
+
+def _row(name, een, fact, verbruik):
+    return {'Onderdeel': name, 'Eenheid': een, 'Emissiefactor': fact, 'Verbruik': verbruik, 'Footprint': verbruik * fact}
+
+
+def equipment_factor(unit, factors, choice=None):
+    options = choice_options(unit, factors)
+    if choice is None and options:
+        choice = options[0]
+    if unit in factors["emission_factors"]:
+        return factors["emission_factors"][unit][choice.lower()]
+    if unit == 'L':
+        return factors["brandstof_factors"][choice]
+    return 0.0
+
+
+def consumption_rows(cons, factors, choice=None):
+    if cons is None:
+        return []
+    if cons.kind == 'vervoer':
+        agg = classifier.label_rows(cons.labels, cons.label_verbruik, factors)
+        return agg[RESULTAAT_KOLOMMEN].to_dict('records')
+    return [_row(cons.sheet, cons.unit, equipment_factor(cons.unit, factors, choice), cons.verbruik)]
+
+
+def _sheet_consumption_item(item):
+    return sheet_consumption(*item)
+
+
+def workbook_consumption(sheets, workers=None):
+    # De DataFrames staan al in dit proces: aggregeren in threads (pandas geeft de GIL grotendeels vrij)
+    parts = map_ordered(_sheet_consumption_item, sheets.items(), workers, kind="thread")
+    return [c for c in parts if c is not None]
+
+
+def rows_from_consumption(consumptions, factors, choices=None):
+    choices = choices or {}
+    rows = []
+    for cons in consumptions:
+        rows.extend(consumption_rows(cons, factors, choices.get(cons.sheet)))
+    return rows
+
+
+def compute_rows(sheets, factors, choices=None):
+    """Workbook ({tabblad: DataFrame}) + emissiefactoren -> resultaatregels zoals in de calculator.
+
+    `choices` bevat per apparaten-tabblad 'Groen'/'Grijs' of een brandstof; standaard de eerste optie.
+    """
+    return rows_from_consumption(workbook_consumption(sheets), factors, choices)
+
+
+def unit_conflicts(consumptions, factors):
+    """Meldingen voor vervoerlabels waarvan de indexfactor een andere eenheid heeft dan het verbruik."""
+    meldingen = []
+    for cons in consumptions:
+        if cons.kind != 'vervoer':
+            continue
+        classified = classifier.classify(cons.labels)
+        priced = classifier.price(classified, factors)
+        for i in priced.index[priced['Eenheidsconflict']]:
+            meldingen.append(f"Tabblad '{cons.sheet}': de factor voor '{classified.at[i, 'Label']}' is per {priced.at[i, 'Eenheid']}, "
+                             f"het verbruik in {classified.at[i, 'Eenheid']}; footprint op 0 gezet.")
+    return meldingen
+
+
+def total_footprint(rows):
+    return sum(r['Footprint'] for r in rows)
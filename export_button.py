@@ -0,0 +1,22 @@
+import streamlit as st
+
+from exports import FORMATS, export_bytes, frame_digest
+
+
+def render_export(df, label, file_stem, key, sheet_name="Resultaten"):
+    """Exportknop die het bestand pas aanmaakt als de gebruiker erom vraagt."""
+    cols = st.columns([2, 2, 3])
+    fmt = cols[0].selectbox("Formaat", list(FORMATS), format_func=lambda f: FORMATS[f][0], key=f"{key}_formaat", label_visibility="collapsed")
+    state_key = f"{key}_klaar"
+    digest = frame_digest(df)
+    if cols[1].button("Export voorbereiden", key=f"{key}_voorbereiden"):
+        st.session_state[state_key] = (digest, fmt)
+    # Alleen tonen als de export bij de huidige resultaten en het gekozen formaat hoort
+    if st.session_state.get(state_key) == (digest, fmt):
+        cols[2].download_button(
+            label,
+            data=export_bytes(df, fmt, sheet_name, digest),
+            file_name=f"{file_stem}.{fmt}",
+            mime=FORMATS[fmt][1],
+            key=f"{key}_download",
+        )
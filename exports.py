@@ -0,0 +1,142 @@
+import csv
+import hashlib
+import io
+import os
+
+import pandas as pd
+
+from memory_store import store
+
+EXPORT_CHUNK_ROWS = 50000
+
+FORMATS = {
+    "xlsx": ("Excel (.xlsx)", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "csv": ("CSV (.csv)", "text/csv"),
+    "parquet": ("Parquet (.parquet)", "application/vnd.apache.parquet"),
+}
+
+# Exportbestanden per inhoud en formaat, in de gedeelde store
+_exports = store.namespace("exports")
+
+
+def _cell(value):
+    return None if pd.isna(value) else value
+
+
+class _CsvWriter:
+    def __init__(self, target, columns):
+        self._owned = isinstance(target, (str, os.PathLike))
+        if self._owned:
+            self._fh = open(target, "w", newline="", encoding="utf-8")
+        else:
+            self._fh = io.TextIOWrapper(target, encoding="utf-8", newline="", write_through=True)
+        self._writer = csv.writer(self._fh)
+        self._writer.writerow(columns)
+
+    def write(self, chunk):
+        self._writer.writerows(chunk.itertuples(index=False, name=None))
+
+    def close(self):
+        if self._owned:
+            self._fh.close()
+        else:
+            # Het buffer-object van de aanroeper blijft open
+            self._fh.flush()
+            self._fh.detach()
+
+
+class _ParquetWriter:
+    def __init__(self, target, columns):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise RuntimeError("Parquet-export vereist het pakket 'pyarrow'.") from e
+        self._pa, self._pq = pa, pq
+        self._target = target
+        self._columns = columns
+        self._writer = None
+
+    def _table(self, chunk):
+        chunk = chunk.copy()
+        for col in chunk.columns:
+            if chunk[col].dtype == object:
+                chunk[col] = chunk[col].map(lambda v: None if pd.isna(v) else str(v))
+        return self._pa.Table.from_pandas(chunk, preserve_index=False)
+
+    def write(self, chunk):
+        table = self._table(chunk)
+        if self._writer is None:
+            # Tekstkolommen altijd als string, ook als de eerste chunk alleen lege waarden heeft
+            schema = self._pa.schema([
+                self._pa.field(f.name, self._pa.string()) if self._pa.types.is_null(f.type) else f
+                for f in table.schema
+            ])
+            self._writer = self._pq.ParquetWriter(self._target, schema)
+            self._schema = schema
+        self._writer.write_table(table.cast(self._schema))
+
+    def close(self):
+        if self._writer is None:
+            self.write(pd.DataFrame(columns=self._columns))
+        self._writer.close()
+
+
+class _XlsxWriter:
+    def __init__(self, target, columns, sheet_name="Resultaten"):
+        from openpyxl import Workbook
+        # write_only: rijen gaan direct naar het zip-bestand in plaats van in het geheugen te blijven
+        self._wb = Workbook(write_only=True)
+        self._ws = self._wb.create_sheet(sheet_name)
+        self._ws.append(list(columns))
+        self._target = target
+
+    def write(self, chunk):
+        for row in chunk.itertuples(index=False, name=None):
+            self._ws.append([_cell(v) for v in row])
+
+    def close(self):
+        self._wb.save(self._target)
+
+
+def open_writer(target, fmt, columns, sheet_name="Resultaten"):
+    """Schrijver met write(chunk)/close() die een export in delen wegschrijft."""
+    if fmt == "csv":
+        return _CsvWriter(target, columns)
+    if fmt == "parquet":
+        return _ParquetWriter(target, columns)
+    if fmt == "xlsx":
+        return _XlsxWriter(target, columns, sheet_name)
+    raise ValueError(f"Onbekend exportformaat: {fmt}")
+
+
+def format_for_path(path):
+    ext = os.path.splitext(str(path))[1].lower().lstrip(".")
+    return ext if ext in FORMATS else "xlsx"
+
+
+def write_frame(df, target, fmt, sheet_name="Resultaten", chunk_rows=EXPORT_CHUNK_ROWS):
+    writer = open_writer(target, fmt, list(df.columns), sheet_name)
+    for start in range(0, len(df), chunk_rows):
+        writer.write(df.iloc[start:start + chunk_rows])
+    writer.close()
+
+
+def frame_digest(df):
+    h = hashlib.sha256()
+    h.update(",".join(map(str, df.columns)).encode())
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def export_bytes(df, fmt, sheet_name="Resultaten", digest=None):
+    """Exportbestand als bytes; gecachet op inhoud en formaat."""
+    key = (digest or frame_digest(df), fmt, sheet_name)
+    data = _exports.get(key)
+    if data is None:
+        buf = io.BytesIO()
+        write_frame(df, buf, fmt, sheet_name)
+        data = buf.getvalue()
+        _exports.put(key, data)
+    return data
+
@@ -0,0 +1,166 @@
+import json
+import os
+import threading
+from io import BytesIO
+from pathlib import Path
+
+import pandas as pd
+
+from workbook_cache import content_hash, read_bytes
+
+# Ophogen bij elke wijziging in de opbouw van het indexbestand
+INDEX_VERSION = 1
+INDEX_PATH = Path(os.environ.get("MAKITATOOL_FACTOR_INDEX", Path.home() / ".cache" / "makitatool" / "factor_index.json"))
+
+NAAM_KOLOM = 'Gasvormige brandstoffen'
+FACTOR_KOLOM = 'Kg CO₂-eq / eenheid'
+EENHEID_KOLOM = 'Eenheid'
+
+# Namen in de emissiefactoren-sheet waaruit de instellingen gevuld worden
+FACTOR_NAMEN = {
+    ("kWh", "groen"): "windkracht",
+    ("kWh", "grijs"): "grijze stroom",
+    ("m³", "groen"): "groengas (gemiddeld)",
+    ("m³", "grijs"): "aardgas (g-gas)",
+}
+BRANDSTOF_NAMEN = {"benzine": "benzine (fossiel) e0", "diesel": "diesel (fossiel) b0", "lpg": "lpg"}
+
+# Gangbare labels uit wagenparklijsten -> naam in de factorsheet
+ALIASSEN = {
+    **BRANDSTOF_NAMEN,
+    "euro 95": "benzine (fossiel) e0",
+    "gasolie": "diesel (fossiel) b0",
+    "aardgas": "aardgas (g-gas)",
+    "cng": "aardgas (g-gas)",
+    "groengas": "groengas (gemiddeld)",
+    "groene stroom": "windkracht",
+}
+
+
+# Schrijfwijzen van dezelfde eenheid (factorsheet vs. werkmap)
+EENHEID_ALIASSEN = {"l": "l", "liter": "l", "litre": "l", "ltr": "l", "m3": "m³", "kilowattuur": "kwh"}
+
+
+def normalize(name):
+    return " ".join(str(name).strip().lower().split())
+
+
+def same_unit(a, b):
+    """True als `a` en `b` dezelfde eenheid zijn; een onbekende eenheid (None) past altijd."""
+    if a is None or b is None:
+        return True
+    a, b = normalize(a), normalize(b)
+    return EENHEID_ALIASSEN.get(a, a) == EENHEID_ALIASSEN.get(b, b)
+
+
+# Per proces gecachete index: (mtime van het bestand, FactorIndex)
+_lock = threading.Lock()
+_current = None
+
+
+class FactorIndex:
+    """Alle factoren uit de factorsheet, opzoekbaar op genormaliseerde naam of alias."""
+
+    def __init__(self, entries, aliases=None, source_hash=None, version=INDEX_VERSION):
+        self.entries = entries
+        self.aliases = dict(ALIASSEN if aliases is None else aliases)
+        self.source_hash = source_hash
+        self.version = version
+
+    def __len__(self):
+        return len(self.entries)
+
+    def lookup(self, name):
+        key = normalize(name)
+        entry = self.entries.get(key)
+        if entry is None and key in self.aliases:
+            entry = self.entries.get(self.aliases[key])
+        return entry
+
+    def factor(self, name, default=None):
+        entry = self.lookup(name)
+        return entry['factor'] if entry is not None else default
+
+    def to_dict(self):
+        return {"version": self.version, "source_hash": self.source_hash, "entries": self.entries, "aliases": self.aliases}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["entries"], data.get("aliases"), data.get("source_hash"), data.get("version"))
+
+
+def compile_index(source, save=True):
+    """Leest de factorsheet (koppen vanaf rij 5) één keer en bouwt er een FactorIndex van.
+
+    Met `save` wordt de index ook de startindex op schijf voor nieuwe sessies; zonder
+    blijft hij alleen in het geheugen (batchverwerking).
+    """
+    data = read_bytes(source)
+    source_hash = content_hash(data)
+    cached = load_index()
+    if cached is not None and cached.source_hash == source_hash:
+        return cached
+
+    df = pd.read_excel(BytesIO(data), skiprows=4)
+    names = df[NAAM_KOLOM].astype(str).map(normalize)
+    factors = pd.to_numeric(df[FACTOR_KOLOM], errors='coerce')
+    units = df[EENHEID_KOLOM] if EENHEID_KOLOM in df.columns else pd.Series(None, index=df.index)
+    entries = {}
+    for name, original, factor, unit in zip(names, df[NAAM_KOLOM], factors, units):
+        # Eerste voorkomen wint, net als bij de oorspronkelijke opzoeking
+        if pd.isna(factor) or name in entries or name == 'nan':
+            continue
+        entries[name] = {"name": str(original).strip(), "factor": float(factor), "unit": None if pd.isna(unit) else str(unit)}
+    index = FactorIndex(entries, source_hash=source_hash)
+    if save:
+        save_index(index)
+    return index
+
+
+def save_index(index, path=INDEX_PATH):
+    global _current
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(index.to_dict(), fh, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, path)
+    with _lock:
+        _current = (path.stat().st_mtime, index)
+
+
+def load_index(path=INDEX_PATH):
+    """Index van schijf (per proces gecachet); None als er geen bruikbare index is."""
+    global _current
+    path = Path(path)
+    try:
+        mtime = path.stat().st_mtime
+    except OSError:
+        return None
+    with _lock:
+        if _current is not None and _current[0] == mtime:
+            return _current[1]
+    try:
+        with open(path, encoding="utf-8") as fh:
+            data = json.load(fh)
+    except (OSError, ValueError):
+        return None
+    if data.get("version") != INDEX_VERSION:
+        return None
+    index = FactorIndex.from_dict(data)
+    with _lock:
+        _current = (mtime, index)
+    return index
+
+
+def apply_to_factors(index, factors):
+    """Vult de instellingen (emission_factors / brandstof_factors) uit de index."""
+    for (unit, color), name in FACTOR_NAMEN.items():
+        value = index.factor(name)
+        if value is not None:
+            factors["emission_factors"][unit][color] = value
+    for key, name in BRANDSTOF_NAMEN.items():
+        value = index.factor(name)
+        if value is not None:
+            factors["brandstof_factors"][key] = value
+    return factors
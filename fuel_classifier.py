@@ -0,0 +1,114 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+from factor_index import same_unit
+
+# Sleutel voor de factor van elektrisch vervoer (st.session_state.elekfactor)
+ELEK_KEY = '@elek'
+# Sleutel 'first-word': eerste woord van het label, bv. 'Diesel Euro 6' -> 'diesel'
+FIRST_WORD = None
+
+# Classificatietabel: (substrings in het label, eenheid, factorsleutel, onderdeelnaam).
+# De eerste regel die matcht wint; labels zonder match vallen terug op DEFAULT_RULE.
+FUEL_RULES = [
+    (('elektrisch', 'elektriciteit', 'ev'), 'kWh', ELEK_KEY, 'Vervoer-E'),
+    (('hybride',), 'L', 'benzine', 'Vervoer-Hybride'),
+]
+DEFAULT_RULE = ('L', FIRST_WORD, 'Vervoer-{label}')
+
+
+class FuelClassifier:
+    def __init__(self, rules=FUEL_RULES, default=DEFAULT_RULE):
+        self.rules = [(re.compile('|'.join(re.escape(s) for s in subs)), een, key, name) for subs, een, key, name in rules]
+        self.default = default
+
+    def classify(self, labels):
+        """Brandstoflabels -> DataFrame met Label, Onderdeel, Eenheid en FactorKey (één vectoriële stap)."""
+        labels = pd.Series(labels, dtype=object).astype(str).reset_index(drop=True)
+        lc = labels.str.lower()
+        first_word = lc.str.split().str[0]
+
+        d_een, d_key, d_name = self.default
+        een = pd.Series(d_een, index=labels.index, dtype=object)
+        key = first_word if d_key is FIRST_WORD else pd.Series(d_key, index=labels.index, dtype=object)
+        name = labels.map(lambda lbl: d_name.format(label=lbl))
+        # Regels in omgekeerde volgording toepassen zodat de eerste match het laatst schrijft
+        for pattern, r_een, r_key, r_name in reversed(self.rules):
+            m = lc.str.contains(pattern).to_numpy()
+            een = een.mask(m, r_een)
+            key = key.mask(m, r_key)
+            name = name.mask(m, r_name)
+        return pd.DataFrame({'Label': labels, 'Onderdeel': name, 'Eenheid': een, 'FactorKey': key})
+
+    def price(self, classified, factors):
+        """Emissiefactor, Eenheid en Eenheidsconflict per geclassificeerd label.
+
+        Labels buiten de instellingen krijgen factor én eenheid uit de factorindex. Is die
+        eenheid een andere dan die van het verbruik (bv. kg CNG tegen liters), dan blijft de
+        factor 0 en staat Eenheidsconflict aan, in plaats van eenheden te mengen.
+        """
+        lookup = dict(factors["brandstof_factors"])
+        lookup[ELEK_KEY] = factors["elekfactor"]
+        values = classified['FactorKey'].map(lookup)
+        units = classified['Eenheid'].copy()
+        conflict = pd.Series(False, index=classified.index)
+        index = factors.get("factor_index")
+        missing = values.isna()
+        if index is not None and missing.any():
+            # Onbekende labels via de factorindex: eerst het volledige label, dan de sleutel
+            for i in missing[missing].index:
+                label, key = classified.at[i, 'Label'], classified.at[i, 'FactorKey']
+                entry = index.lookup(label)
+                if entry is None and isinstance(key, str):
+                    entry = index.lookup(key)
+                if entry is None:
+                    continue
+                if entry.get('unit') is not None:
+                    units.at[i] = entry['unit']
+                    if not same_unit(entry['unit'], classified.at[i, 'Eenheid']):
+                        conflict.at[i] = True
+                        continue
+                values.at[i] = entry['factor']
+        return pd.DataFrame({
+            'Emissiefactor': values.fillna(0.0).astype(float),
+            'Eenheid': units,
+            'Eenheidsconflict': conflict,
+        })
+
+    def factors_for(self, classified, factors):
+        return self.price(classified, factors)['Emissiefactor']
+
+    def label_totals(self, df):
+        """Som van 'Brandstof p/j' per brandstoflabel, in volgorde van eerste voorkomen."""
+        labels = df['Brandstof']
+        verbruik = pd.to_numeric(df['Brandstof p/j'], errors='coerce')
+        values = verbruik.to_numpy()
+        if values.dtype.kind == 'f':
+            values = np.where(np.isnan(values), 0.0, values)
+
+        valid = labels.notna().to_numpy()
+        codes, uniques = pd.factorize(labels[valid], sort=False)
+        # Eén groupby voor de indices; per groep dezelfde sommatie als Series.sum() voor exacte uitkomsten
+        groups = pd.Series(codes).groupby(codes, sort=False).indices
+        values = values[valid]
+        return list(uniques), [values[groups[i]].sum() for i in range(len(uniques))]
+
+    def label_rows(self, labels, sums, factors):
+        """Verbruik per label -> DataFrame met eenheid, factor, footprint en Eenheidsconflict."""
+        out = self.classify(labels)
+        out['Verbruik'] = list(sums)
+        priced = self.price(out, factors)
+        out['Eenheid'] = priced['Eenheid']
+        out['Emissiefactor'] = priced['Emissiefactor']
+        out['Eenheidsconflict'] = priced['Eenheidsconflict']
+        out['Footprint'] = out['Verbruik'] * out['Emissiefactor']
+        return out
+
+    def aggregate(self, df, factors):
+        """Verbruik per brandstoflabel (volgorde van eerste voorkomen) met eenheid, factor en footprint."""
+        return self.label_rows(*self.label_totals(df), factors)
+
+
+classifier = FuelClassifier()
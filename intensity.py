@@ -0,0 +1,184 @@
+import os
+import re
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+from memory_store import store
+from workbook_cache import read_bytes, source_key
+
+# Vanaf dit aantal regels: WebGL-grafieken, downsampling en een zoomvenster
+LARGE_SERIES_ROWS = int(os.environ.get("MAKITATOOL_LARGE_SERIES_ROWS", "5000"))
+# Maximaal aantal punten per lijn dat naar de browser gaat
+MAX_PLOT_POINTS = int(os.environ.get("MAKITATOOL_MAX_PLOT_POINTS", "2000"))
+
+BESTANDSTYPEN = ["xlsx", "csv", "parquet"]
+
+# Verwachte kolomnamen (flexibel voor variaties met veel substrings)
+JAAR_SUBSTRINGS = ['jaar', 'year', 'periode', 'datum', 'date', 'time', 'tijd', 'boekjaar']
+OMZET_SUBSTRINGS = ['omzet', 'revenue', 'turnover', 'sales', 'verkoop', 'inkomsten', 'opbrengst', 'netto', 'bruto', 'facturatie', 'totaal']
+CO2_SUBSTRINGS = ['co2', 'co₂', 'footprint', 'uitstoot', 'emissie', 'carbon', 'koolstof', 'milieu', 'duurzaam', 'klimaat', 'scope', 'ghg', 'greenhouse']
+ENTITEIT_SUBSTRINGS = ['site', 'entiteit', 'entity', 'locatie', 'vestiging', 'afdeling']
+
+_series = store.namespace("intensiteit")
+
+
+def _pattern(substrings):
+    return re.compile('|'.join(re.escape(s) for s in substrings))
+
+
+_PATRONEN = {
+    'jaar': _pattern(JAAR_SUBSTRINGS),
+    'omzet': _pattern(OMZET_SUBSTRINGS),
+    'co2': _pattern(CO2_SUBSTRINGS),
+    'entiteit': _pattern(ENTITEIT_SUBSTRINGS),
+}
+
+
+def read_table(source, name=None):
+    """Leest een intensiteitsbestand als xlsx, csv of parquet (op basis van de extensie)."""
+    if name is None:
+        name = str(source) if isinstance(source, (str, os.PathLike)) else getattr(source, "name", "")
+    suffix = os.path.splitext(str(name))[1].lower()
+    data = read_bytes(source)
+    if suffix == ".parquet":
+        return pd.read_parquet(BytesIO(data))
+    if suffix == ".csv":
+        # Nederlandse exports gebruiken vaak ';' met een decimale komma
+        head = data[:4096].decode("utf-8", errors="ignore").split("\n", 1)[0]
+        if head.count(";") > head.count(","):
+            return pd.read_csv(BytesIO(data), sep=";", decimal=",")
+        return pd.read_csv(BytesIO(data))
+    return pd.read_excel(BytesIO(data))
+
+
+def find_columns(df):
+    """Eerste passende kolom per type als {'jaar', 'omzet', 'co2', 'entiteit'}; None als er een verplichte ontbreekt."""
+    names = pd.Index([str(c) for c in df.columns]).str.lower()
+    found = {}
+    for kind, pattern in _PATRONEN.items():
+        matches = df.columns[names.str.contains(pattern)]
+        found[kind] = matches[0] if len(matches) else None
+    if found['jaar'] is None or found['omzet'] is None or found['co2'] is None:
+        return None
+    if found['entiteit'] in (found['jaar'], found['omzet'], found['co2']):
+        found['entiteit'] = None
+    return found
+
+
+def _periode(col):
+    # Jaartallen blijven numeriek; datums (maand- of dagreeksen) worden datetime
+    if pd.api.types.is_datetime64_any_dtype(col):
+        return col
+    numeric = pd.to_numeric(col, errors='coerce')
+    if numeric.notna().any() or col.isna().all():
+        return numeric
+    return pd.to_datetime(col, errors='coerce')
+
+
+def clean_series(df, columns):
+    """Jaar, (Entiteit,) Omzet_miljoen, CO2_ton en CO2_Intensiteit, zonder lege regels en gesorteerd op periode."""
+    clean = pd.DataFrame({'Jaar': _periode(df[columns['jaar']])})
+    if columns.get('entiteit') is not None:
+        clean['Entiteit'] = df[columns['entiteit']].astype(str)
+    clean['Omzet_miljoen'] = pd.to_numeric(df[columns['omzet']], errors='coerce')
+    clean['CO2_ton'] = pd.to_numeric(df[columns['co2']], errors='coerce')
+    clean = clean.dropna(subset=['Jaar', 'Omzet_miljoen', 'CO2_ton'])
+    # Bereken CO2-intensiteit (ton CO2 per miljoen euro omzet)
+    clean['CO2_Intensiteit'] = clean['CO2_ton'] / clean['Omzet_miljoen']
+    return clean.sort_values('Jaar')
+
+
+def load_series(source, name=None):
+    """(schone reeks, gevonden kolommen) voor een upload; per inhoud één keer ingelezen.
+
+    Zonder herkenbare kolommen is de reeks None en zijn de kolommen de ruwe kolomnamen.
+    """
+    key = source_key(source)
+    cached = _series.get(key)
+    if cached is None:
+        raw = read_table(source, name)
+        columns = find_columns(raw)
+        cached = (clean_series(raw, columns), columns) if columns else (None, list(raw.columns))
+        _series.put(key, cached)
+    return cached
+
+
+def period_series(clean):
+    """Eén regel per periode; met entiteiten wordt per periode opgeteld voordat de intensiteit wordt bepaald."""
+    if 'Entiteit' not in clean.columns:
+        return clean
+    totals = clean.groupby('Jaar', sort=True)[['Omzet_miljoen', 'CO2_ton']].sum().reset_index()
+    totals['CO2_Intensiteit'] = totals['CO2_ton'] / totals['Omzet_miljoen']
+    return totals
+
+
+def summary(series):
+    """Start- en eindwaarde, verandering en beste periode van een periodereeks (None bij minder dan 2 regels)."""
+    if len(series) < 2:
+        return None
+    intensiteit = series['CO2_Intensiteit']
+    start, eind = intensiteit.iloc[0], intensiteit.iloc[-1]
+    beste = intensiteit.idxmin()
+    return {
+        'start': start,
+        'eind': eind,
+        'verandering_pct': (eind - start) / start * 100,
+        'beste_periode': series.at[beste, 'Jaar'],
+        'beste_waarde': intensiteit.min(),
+    }
+
+
+def is_large(series):
+    return len(series) > LARGE_SERIES_ROWS
+
+
+def _as_float(values):
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.datetime64):
+        return values.astype('datetime64[ns]').astype(np.int64).astype(float)
+    return values.astype(float)
+
+
+def lttb(x, y, threshold):
+    """Indices die Largest-Triangle-Three-Buckets bewaart; eerste en laatste punt blijven altijd staan."""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = _as_float(x)
+    y = _as_float(y)
+    # threshold - 2 emmers tussen het eerste en laatste punt
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    keep = np.empty(threshold, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        if i == threshold - 3:
+            cx, cy = x[n - 1], y[n - 1]
+        else:
+            nxt_end = edges[i + 2]
+            cx, cy = x[end:nxt_end].mean(), y[end:nxt_end].mean()
+        ax, ay = x[a], y[a]
+        area = np.abs((ax - cx) * (y[start:end] - ay) - (ax - x[start:end]) * (cy - ay))
+        a = start + int(area.argmax())
+        keep[i + 1] = a
+    return keep
+
+
+def window(series, lo, hi, column='Jaar'):
+    """Regels met `lo <= periode <= hi`; de reeks is gesorteerd, dus via searchsorted."""
+    values = series[column].to_numpy()
+    start = np.searchsorted(values, np.asarray(lo, dtype=values.dtype), side='left')
+    end = np.searchsorted(values, np.asarray(hi, dtype=values.dtype), side='right')
+    return series.iloc[start:end]
+
+
+def downsample(series, y, x='Jaar', max_points=MAX_PLOT_POINTS):
+    """Vormbehoudende selectie van hoogstens `max_points` regels van `series` voor een lijngrafiek."""
+    if len(series) <= max_points:
+        return series
+    if not series[x].is_monotonic_increasing:
+        series = series.sort_values(x)
+    return series.iloc[lttb(series[x].to_numpy(), series[y].to_numpy(), max_points)]
@@ -0,0 +1,191 @@
+import threading
+import time
+
+import results_model
+import streaming_reader
+import workbook_cache
+from co2_engine import sheet_consumption
+from workbook_cache import LRUCache, read_bytes, source_key
+
+# Pauze tussen twee reruns terwijl de pagina op een job wacht
+POLL_SECONDS = 0.5
+
+WACHTEND, BEZIG, KLAAR, GEANNULEERD, FOUT = "wachtend", "bezig", "klaar", "geannuleerd", "fout"
+
+# Jobs per (inhoudshash, streaming), gedeeld door alle sessies van dit proces
+_jobs = LRUCache(16)
+_jobs_lock = threading.Lock()
+
+
+class _Cancelled(Exception):
+    pass
+
+
+class IngestJob:
+    """Leest één upload in een achtergrondthread in; voortgang en deelresultaten per tabblad.
+
+    Sessies met hetzelfde bestand delen de job. Annuleren meldt alleen de eigen sessie af;
+    de thread stopt pas als geen enkele sessie meer op de job wacht.
+    """
+
+    def __init__(self, key, streaming, workers=None):
+        self.key = key
+        self.streaming = streaming
+        self.workers = workers
+        self.status = WACHTEND
+        self.error = None
+        self.started = time.time()
+        self.finished = None
+        self._sheets = []
+        self._progress = {}
+        self._results = {}
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._sessions = set()
+        self._afgemeld = set()
+
+    @classmethod
+    def completed(cls, key, streaming, consumptions):
+        # Het verbruik stond al in de cache: geen thread nodig
+        job = cls(key, streaming)
+        job._sheets = [cons.sheet for cons in consumptions]
+        job._progress = {sheet: 1.0 for sheet in job._sheets}
+        job._results = dict(enumerate(consumptions))
+        job.status = KLAAR
+        job.finished = job.started
+        return job
+
+    def start(self, data):
+        self.status = BEZIG
+        self._thread = threading.Thread(target=self._run, args=(data,), daemon=True, name=f"ingest-{self.key[:8]}")
+        self._thread.start()
+        return self
+
+    def attach(self, session):
+        # Een sessie die zelf geannuleerd heeft, haakt pas weer aan via resume()
+        with self._lock:
+            if session is not None and session not in self._afgemeld:
+                self._sessions.add(session)
+
+    def resume(self, session):
+        with self._lock:
+            self._afgemeld.discard(session)
+            if session is not None:
+                self._sessions.add(session)
+
+    def cancel(self, session=None):
+        """Meldt `session` af; zonder andere wachtende sessies stopt de job."""
+        with self._lock:
+            if session is not None:
+                self._sessions.discard(session)
+                self._afgemeld.add(session)
+            if not self._sessions:
+                self._cancel.set()
+
+    def status_for(self, session):
+        """Status zoals `session` hem ziet: geannuleerd zodra die sessie heeft afgemeld, tenzij de job al klaar is."""
+        with self._lock:
+            if session in self._afgemeld and self.status != KLAAR:
+                return GEANNULEERD
+        return self.status
+
+    @property
+    def stopping(self):
+        return self._cancel.is_set() and not self.done
+
+    @property
+    def done(self):
+        return self.status in (KLAAR, GEANNULEERD, FOUT)
+
+    def progress(self):
+        """[(tabblad, 0..1)] in workbookvolgorde."""
+        with self._lock:
+            return [(sheet, self._progress[sheet]) for sheet in self._sheets]
+
+    def consumptions(self):
+        """Herkende tabbladen die al klaar zijn, in workbookvolgorde."""
+        with self._lock:
+            return [self._results[i] for i in sorted(self._results) if self._results[i] is not None]
+
+    def _check_cancel(self):
+        if self._cancel.is_set():
+            raise _Cancelled()
+
+    def _on_names(self, names):
+        with self._lock:
+            self._sheets = names
+            self._progress = {sheet: 0.0 for sheet in names}
+        # Het openen van het workbook kan lang duren; daarna meteen stoppen als er geannuleerd is
+        self._check_cancel()
+
+    def _on_rows(self, position, done, total):
+        self._check_cancel()
+        if total:
+            with self._lock:
+                self._progress[self._sheets[position]] = min(done / total, 0.99)
+
+    def _parts(self, data):
+        if self.streaming:
+            yield from streaming_reader.iter_sheets(data, workers=self.workers, on_rows=self._on_rows, on_names=self._on_names)
+            return
+        # Zonder voortgang per rij kan deze weg alleen tussen twee tabbladen stoppen
+        for i, df in workbook_cache.iter_sheets(data, self.workers, on_names=self._on_names):
+            self._check_cancel()
+            yield i, sheet_consumption(self._sheets[i], df)
+
+    def _run(self, data):
+        try:
+            self._check_cancel()
+            parts = self._parts(data)
+            try:
+                for i, cons in parts:
+                    with self._lock:
+                        self._results[i] = cons
+                        self._progress[self._sheets[i]] = 1.0
+                    self._check_cancel()
+            finally:
+                # Sluit de pool of het workbook; nog niet gestarte tabbladen vervallen
+                parts.close()
+            results_model.remember_consumption(self.key, self.streaming, self.consumptions())
+            self.status = KLAAR
+        except _Cancelled:
+            self.status = GEANNULEERD
+        except Exception as e:
+            self.error = e
+            self.status = FOUT
+        finally:
+            self.finished = time.time()
+
+
+def ingest(source, streaming, session=None, workers=None):
+    """De job voor `source`: een rerun (of andere sessie) met hetzelfde bestand krijgt dezelfde job terug."""
+    key = source_key(source)
+    with _jobs_lock:
+        job = _jobs.get((key, streaming))
+        if job is None:
+            cached = results_model.cached_consumption(key, streaming)
+            if cached is not None:
+                job = IngestJob.completed(key, streaming, cached)
+            else:
+                job = IngestJob(key, streaming, workers).start(read_bytes(source))
+            _jobs.put((key, streaming), job)
+        elif job.status == KLAAR and results_model.cached_consumption(key, streaming) is None:
+            results_model.remember_consumption(key, streaming, job.consumptions())
+        job.attach(session)
+    return job
+
+
+def restart(source, streaming, session=None, workers=None):
+    """Start een geannuleerde of mislukte job opnieuw; loopt hij voor andere sessies nog, dan haakt `session` weer aan."""
+    key = source_key(source)
+    with _jobs_lock:
+        job = _jobs.get((key, streaming))
+        if job is not None and not job.done and not job.stopping:
+            job.resume(session)
+            return job
+        job = IngestJob(key, streaming, workers)
+        job.attach(session)
+        job.start(read_bytes(source))
+        _jobs.put((key, streaming), job)
+    return job
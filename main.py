@@ -1,61 +1,144 @@
 import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 import pandas as pd
-from io import BytesIO
-import matplotlib.pyplot as plt
-import plotly.express as px
-import plotly.graph_objects as go
+import numpy as np
 import os
+import time
+import uuid
+from datetime import date
+
+import intensity
+import jobs
+import memory_store
+import profiling
+import results_store
+from assets import read_asset
+from co2_engine import RESULTAAT_KOLOMMEN, choice_options, factors_from_state, load_factor_workbook, unit_conflicts
+from export_button import render_export
+from factor_index import apply_to_factors, load_index
+from results_model import ResultsModel, load_consumption, model_for
+from results_table import render_table
+from scenarios import MAX_SCENARIOS, PERCENTIELEN, ScenarioModel, bands
+from streaming_reader import use_streaming
+from visualisaties import workbook_summaries
+from workbook_cache import UploadEvicted, store_upload
 
 st.set_page_config(page_title="CO₂ Calculator", layout="wide")
-st.image("makita_logo.png", width=500)
+st.image(read_asset("makita_logo.png"), width=500)
 
 # SESSION STATE
 if "emission_factors" not in st.session_state:
     st.session_state.emission_factors = {"kWh": {"groen": 0.0, "grijs": 0.0}, "m³": {"groen": 0.0, "grijs": 0.0}}
 if "elekfactor" not in st.session_state:
     st.session_state.elekfactor = 0.078
+if "factor_index" not in st.session_state:
+    # Nieuwe sessie: de index op schijf is alleen het startpunt, daarna heeft elke sessie zijn eigen index
+    st.session_state.factor_index = load_index()
 if "brandstof_factors" not in st.session_state:
     st.session_state.brandstof_factors = {"benzine": 0.0, "diesel": 0.0, "lpg": 0.0}
+    # Nieuwe sessie: factoren uit de startindex overnemen
+    if st.session_state.factor_index is not None:
+        apply_to_factors(st.session_state.factor_index, factors_from_state(st.session_state))
 if "uploaded_file" not in st.session_state:
     st.session_state.uploaded_file = None
-if "export_rows" not in st.session_state:
-    st.session_state.export_rows = []
+if "upload_versie" not in st.session_state:
+    st.session_state.upload_versie = 0
+if "factoren_versie" not in st.session_state:
+    st.session_state.factoren_versie = 0
+if "intensity_upload" not in st.session_state:
+    st.session_state.intensity_upload = None
+if "intensity_versie" not in st.session_state:
+    st.session_state.intensity_versie = 0
 if "total_footprint" not in st.session_state:
     st.session_state.total_footprint = 0.0
+if "factor_choices" not in st.session_state:
+    st.session_state.factor_choices = {}
+# De ruwe upload kan door het geheugenbudget uit de gedeelde store zijn verwijderd
+if st.session_state.uploaded_file is not None and not st.session_state.uploaded_file.available():
+    st.session_state.uploaded_file = None
+    st.sidebar.warning("Het geüploade bestand is uit het geheugen verwijderd; upload het opnieuw op de CO₂ Calculator-pagina.")
+
+if "sessie_id" not in st.session_state:
+    st.session_state.sessie_id = uuid.uuid4().hex[:8]
 
 page = st.sidebar.selectbox("Ga naar", ["Opties", "CO₂ Calculator", "Visualisaties"])
-with open("user_manual.pdf", "rb") as file:
-    st.sidebar.download_button(
-        label="📄 Download Handleiding",
-        data=file,
-        file_name="user_manual.pdf",
-        mime="application/pdf"
-    )
+profiel = profiling.start_rerun(st.sidebar.checkbox("⏱️ Profiler", value=profiling.PROFILE_DEFAULT, key="profiler"), page, st.session_state.sessie_id)
+st.sidebar.download_button(
+    label="📄 Download Handleiding",
+    data=read_asset("user_manual.pdf"),
+    file_name="user_manual.pdf",
+    mime="application/pdf"
+)
+
+
+def zijbalk_afronden():
+    # Geheugen- en profilerpaneel; ook vóór een vroege rerun/stop (wachten op een inleesjob)
+    memory_store.render_panel(st.sidebar)
+    profiling.render_panel(st.sidebar, profiel.finish())
+
+
+def upload_loslaten(uploaded):
+    # Streamlit houdt een upload anders tot het einde van de sessie vast, buiten het geheugenbudget.
+    # remove_file is geen onderdeel van de UploadedFileManager-interface (alleen van de
+    # MemoryUploadedFileManager); zonder die methode blijft het bestand tot het einde van de sessie staan.
+    ctx = get_script_run_ctx()
+    remove_file = getattr(getattr(ctx, "uploaded_file_mgr", None), "remove_file", None)
+    if remove_file is None:
+        return
+    try:
+        remove_file(ctx.session_id, uploaded.file_id)
+    except Exception:
+        pass
+
+
+def inleesjob(streaming, opnieuw=False):
+    # Job voor de upload van deze sessie; de bytes kunnen na de controle bovenaan alsnog uit de
+    # store zijn verwijderd, dan meldt de rerun dat in de zijbalk
+    start = jobs.restart if opnieuw else jobs.ingest
+    try:
+        return start(st.session_state.uploaded_file, streaming, st.session_state.sessie_id)
+    except UploadEvicted:
+        st.rerun()
+
+
+def job_melding(status):
+    # Waarom Visualisaties (nog) geen resultaten van de upload heeft
+    if status == jobs.FOUT:
+        st.error("Inlezen van het bestand is mislukt; de foutmelding en 'Opnieuw inlezen' staan op de CO₂ Calculator-pagina.")
+    elif status == jobs.GEANNULEERD:
+        st.warning("Inlezen van het bestand is geannuleerd; start het opnieuw op de CO₂ Calculator-pagina.")
+    else:
+        st.info("⏳ Het bestand wordt nog ingelezen; de voortgang staat op de CO₂ Calculator-pagina.")
+
 
 # PAGINA: OPTIES
 if page == "Opties":
     st.title("Instellingen: Emissiefactoren")
-    excel_file = st.file_uploader("Upload Excel (koppen vanaf rij 5)", type=["xlsx"], key="factoren_uploader")
+    excel_file = st.file_uploader("Upload Excel (koppen vanaf rij 5)", type=["xlsx"], key=f"factoren_uploader_{st.session_state.factoren_versie}")
     if excel_file:
-        df = pd.read_excel(excel_file, skiprows=4)
-        df['normalized'] = df['Gasvormige brandstoffen'].astype(str).str.strip().str.lower()
-        mapping = {
-            ("kWh", "groen"): "windkracht",
-            ("kWh", "grijs"): "grijze stroom",
-            ("m³", "groen"): "groengas (gemiddeld)",
-            ("m³", "grijs"): "aardgas (g-gas)",
-        }
-        for (unit, color), name in mapping.items():
-            m = df['normalized'] == name
-            if m.any():
-                val = float(df.loc[m, 'Kg CO₂-eq / eenheid'].iloc[0])
-                st.session_state.emission_factors[unit][color] = val
-        bmap = {"benzine": "benzine (fossiel) e0", "diesel": "diesel (fossiel) b0", "lpg": "lpg"}
-        for k, n in bmap.items():
-            m = df['normalized'] == n
-            if m.any():
-                st.session_state.brandstof_factors[k] = float(df.loc[m, 'Kg CO₂-eq / eenheid'].iloc[0])
-        st.success("Emissiefactoren automatisch geladen.")
+        with profiel.stage("factoren_laden"):
+            factors = factors_from_state(st.session_state)
+            load_factor_workbook(excel_file, factors)
+            # Alleen deze sessie rekent met de nieuwe index; andere sessies houden de hunne
+            st.session_state.factor_index = factors["factor_index"]
+        # De factoren staan nu in session_state; het bestand zelf is niet meer nodig
+        st.session_state.factoren_bestand = excel_file.name
+        upload_loslaten(excel_file)
+        st.session_state.factoren_versie += 1
+        st.rerun()
+    if st.session_state.get("factoren_bestand"):
+        st.success(f"Emissiefactoren automatisch geladen uit {st.session_state.factoren_bestand}.")
+
+    index = st.session_state.factor_index
+    if index is not None:
+        st.caption(f"Factorindex: {len(index)} emissiefactoren opgeslagen (versie {index.version}).")
+        zoek = st.text_input("Factor opzoeken (naam of alias)", key="factor_zoek")
+        if zoek:
+            entry = index.lookup(zoek)
+            if entry:
+                st.write(f"**{entry['name']}**: {entry['factor']:.3f} kg CO₂-eq / {entry['unit'] or 'eenheid'}")
+            else:
+                st.warning("Geen factor gevonden.")
 
     # Handmatig bijstellen
     st.subheader("Handmatig bijstellen (optioneel)")
@@ -72,386 +155,516 @@ if page == "Opties":
 # PAGINA: CO₂ Calculator
 elif page == "CO₂ Calculator":
     st.title("CO₂ Calculator")
-    f = st.file_uploader("Upload Excel met tabbladen", type=["xlsx"])
-    if f and f != st.session_state.uploaded_file:
-        st.session_state.uploaded_file = f
-        st.session_state.export_rows = []
-        st.session_state.total_footprint = 0.0
+    f = st.file_uploader("Upload Excel met tabbladen", type=["xlsx"], key=f"werkmap_uploader_{st.session_state.upload_versie}")
+    # In session_state staat alleen een handle; de bytes staan één keer in de gedeelde store
+    if f:
+        vorige = st.session_state.uploaded_file
+        try:
+            handle = store_upload(f)
+        except MemoryError as e:
+            st.session_state.uploaded_file = None
+            st.error(str(e))
+        else:
+            if vorige is None or vorige.key != handle.key:
+                st.session_state.total_footprint = 0.0
+            st.session_state.uploaded_file = handle
+            # Alleen de store houdt de bytes nog vast; een nieuwe uploader-key maakt het veld weer leeg
+            upload_loslaten(f)
+            st.session_state.upload_versie += 1
+            st.rerun()
 
     if st.session_state.uploaded_file:
-        xl = pd.ExcelFile(st.session_state.uploaded_file)
+        st.caption(f"Bestand: {st.session_state.uploaded_file.name} ({st.session_state.uploaded_file.size / 2**20:,.1f} MB)")
+        streaming = st.checkbox("Streaming-modus (grote bestanden, begrensd geheugen)", value=use_streaming(st.session_state.uploaded_file))
+        # Visualisaties gebruikt dezelfde modus, en daarmee hetzelfde ResultsModel
+        st.session_state.streaming_mode = streaming
+        with profiel.stage("excel_parsen") as stap:
+            # Inlezen loopt op de achtergrond; een rerun haakt aan bij de lopende job
+            job = inleesjob(streaming)
+            stap['rows'] = sum(cons.rows for cons in job.consumptions())
+
+        status = job.status_for(st.session_state.sessie_id)
+        if status != jobs.KLAAR:
+            # ——— VOORTGANG VAN HET INLEZEN ———
+            voortgang = job.progress()
+            klaar = sum(1 for _, fractie in voortgang if fractie >= 1.0)
+            st.progress(klaar / len(voortgang) if voortgang else 0.0, text=f"{klaar} van {len(voortgang)} tabbladen ingelezen")
+            with st.expander("Voortgang per tabblad", expanded=len(voortgang) <= 10):
+                for sheet, fractie in voortgang:
+                    st.progress(fractie, text=sheet)
+
+            deel = job.consumptions()
+            if deel:
+                st.markdown("### Deelresultaten")
+                tussenstand = ResultsModel(deel, factors_from_state(st.session_state), st.session_state.factor_choices)
+                st.dataframe(tussenstand.table[['Tabblad'] + RESULTAAT_KOLOMMEN], hide_index=True, use_container_width=True)
+                st.caption(f"Tussenstand: {tussenstand.total:,.2f} kg CO₂")
+
+            if status == jobs.BEZIG:
+                if st.button("Annuleren", key="job_annuleren"):
+                    # Andere sessies met hetzelfde bestand lezen gewoon door
+                    job.cancel(st.session_state.sessie_id)
+                zijbalk_afronden()
+                time.sleep(jobs.POLL_SECONDS)
+                st.rerun()
+            if status == jobs.FOUT:
+                st.error(f"Fout bij het inlezen: {job.error}")
+            else:
+                st.warning("Inlezen geannuleerd.")
+            if st.button("Opnieuw inlezen", key="job_opnieuw"):
+                inleesjob(streaming, opnieuw=True)
+                st.rerun()
+            zijbalk_afronden()
+            st.stop()
+
         st.markdown("### Invoeroverzicht")
-        hdr = st.columns([3, 1, 3, 2, 2])
-        hdr[0].markdown("**Onderdeel**")
-        hdr[1].markdown("**Eenheid**")
-        hdr[2].markdown("**Emissiefactor**")
-        hdr[3].markdown("**Verbruik**")
-        hdr[4].markdown("**Footprint**")
-
-        total_fp = 0.0
-        rows = []
-
-        for sheet in xl.sheet_names:
-            df = xl.parse(sheet)
-            if 'Brandstof' in df.columns:
-                for bt in df['Brandstof'].dropna().unique():
-                    sub = df[df['Brandstof'] == bt]
-                    verbruik = pd.to_numeric(sub['Brandstof p/j'], errors='coerce').sum()
-                    bt_lc = bt.lower()
-                    if any(k in bt_lc for k in ['elektrisch', 'elektriciteit', 'ev']):
-                        fact = st.session_state.elekfactor
-                        een = 'kWh'
-                        name = f"Vervoer-E"
-                    elif 'hybride' in bt_lc:
-                        fact = st.session_state.brandstof_factors.get('benzine', 0.0)
-                        een = 'L'
-                        name = f"Vervoer-Hybride"
-                    else:
-                        een = 'L'
-                        key = bt_lc.split()[0]
-                        fact = st.session_state.brandstof_factors.get(key, 0.0)
-                        name = f"Vervoer-{bt}"
-                    fp = verbruik * fact
-                    total_fp += fp
-                    rows.append({'Onderdeel': name, 'Eenheid': een, 'Emissiefactor': fact, 'Verbruik': verbruik, 'Footprint': fp})
-                    cols = st.columns([3, 1, 3, 2, 2])
-                    cols[0].markdown(name)
-                    cols[1].markdown(een)
-                    cols[2].markdown(f"**{fact:.3f}**")
-                    cols[3].markdown(f"{verbruik:,.2f}")
-                    cols[4].markdown(f"**{fp:,.2f}**")
-
-            elif all(c in df.columns for c in ['Aantal', 'Vermogen', 'Eenheid', 'Draaiuren p/j']):
-                df['Verbruik'] = pd.to_numeric(df['Aantal'], errors='coerce') * pd.to_numeric(df['Vermogen'], errors='coerce') * pd.to_numeric(df['Draaiuren p/j'], errors='coerce')
-                verbruik = df['Verbruik'].sum()
-                een = df['Eenheid'].dropna().iloc[0]
-                if een in st.session_state.emission_factors:
-                    c1, c2, c3, c4, c5 = st.columns([3, 1, 3, 2, 2])
-                    k = c3.radio("Stroomtype", ['Groen', 'Grijs'], horizontal=True, key=sheet + een)
-                    fact = st.session_state.emission_factors[een][k.lower()]
-                elif een == 'L':
-                    fuel = st.selectbox(f"Brandstof '{sheet}'", options=list(st.session_state.brandstof_factors.keys()), key='f' + sheet)
-                    fact = st.session_state.brandstof_factors[fuel]
-                else:
-                    fact = 0.0
-                fp = verbruik * fact
-                total_fp += fp
-                rows.append({'Onderdeel': sheet, 'Eenheid': een, 'Emissiefactor': fact, 'Verbruik': verbruik, 'Footprint': fp})
-                c = st.columns([3, 1, 3, 2, 2])
-                c[0].markdown(sheet)
-                c[1].markdown(een)
-                c[2].markdown(f"**{fact:.3f}**")
-                c[3].markdown(f"{verbruik:,.2f}")
-                c[4].markdown(f"**{fp:,.2f}**")
+        view = st.radio("Weergave", ["Tabel", "Per regel"], horizontal=True, key="weergave")
+        factors = factors_from_state(st.session_state)
+        choices = st.session_state.factor_choices
+        with profiel.stage("berekening") as stap:
+            # Alleen tabbladen met een gewijzigde factor of keuze worden herberekend
+            model = model_for(st.session_state, st.session_state.uploaded_file, streaming, factors, choices)
+            stap['rows'] = len(model.table)
+
+        if view == "Tabel":
+            with profiel.stage("weergave"):
+                render_table(model.table, factors, choices)
+            rows = model.rows()
+            total_fp = model.total
+        else:
+            hdr = st.columns([3, 1, 3, 2, 2])
+            hdr[0].markdown("**Onderdeel**")
+            hdr[1].markdown("**Eenheid**")
+            hdr[2].markdown("**Emissiefactor**")
+            hdr[3].markdown("**Verbruik**")
+            hdr[4].markdown("**Footprint**")
+
+            with profiel.stage("berekening_en_weergave") as stap:
+                total_fp = 0.0
+                rows = []
+
+                for cons in model.consumptions:
+                    choice = None
+                    if cons.kind == 'apparaten':
+                        een = cons.unit
+                        sheet = cons.sheet
+                        options = choice_options(een, factors)
+                        index = options.index(choices[sheet]) if choices.get(sheet) in options else 0
+                        if een in st.session_state.emission_factors:
+                            c1, c2, c3, c4, c5 = st.columns([3, 1, 3, 2, 2])
+                            choice = c3.radio("Stroomtype", options, index=index, horizontal=True, key=sheet + een)
+                        elif een == 'L':
+                            choice = st.selectbox(f"Brandstof '{sheet}'", options=options, index=index, key='f' + sheet)
+                        if choice is not None:
+                            choices[sheet] = choice
+
+                    model.update_sheet(cons, factors, choice)
+                    for row in model.sheet_rows(cons.sheet):
+                        total_fp += row['Footprint']
+                        rows.append(row)
+                        c = st.columns([3, 1, 3, 2, 2])
+                        c[0].markdown(row['Onderdeel'])
+                        c[1].markdown(row['Eenheid'])
+                        c[2].markdown(f"**{row['Emissiefactor']:.3f}**")
+                        c[3].markdown(f"{row['Verbruik']:,.2f}")
+                        c[4].markdown(f"**{row['Footprint']:,.2f}**")
+                stap['rows'] = len(rows)
 
         st.session_state.total_footprint = total_fp
-        st.session_state.export_rows = rows
+        for melding in unit_conflicts(model.consumptions, factors):
+            st.warning(melding)
         st.markdown("---")
         st.subheader(f"Totale CO₂-footprint: **{total_fp:,.2f} kg CO₂**")
 
-        dfout = pd.DataFrame(rows)
-        buf = BytesIO()
-        with pd.ExcelWriter(buf, engine='openpyxl') as writer:
-            dfout.to_excel(writer, index=False, sheet_name='Resultaten')
-        buf.seek(0)
-        st.download_button("📥 Download resultaten", data=buf, file_name="CO2_resultaten.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+        with st.expander("Opslaan in historie"):
+            hcols = st.columns([3, 1, 1])
+            site = hcols[0].text_input("Site", value=os.path.splitext(st.session_state.uploaded_file.name)[0], key="historie_site")
+            jaar = hcols[1].number_input("Jaar", min_value=2000, max_value=2100, value=date.today().year, step=1, key="historie_jaar")
+            if hcols[2].button("Opslaan"):
+                file_hash = st.session_state.uploaded_file.key
+                bestond = results_store.is_ingested(file_hash, site, jaar)
+                if results_store.ingest(file_hash, site, jaar, rows, bestand=st.session_state.uploaded_file.name):
+                    st.success(f"Resultaten voor {site} ({int(jaar)}) {'bijgewerkt met de huidige factoren en keuzes' if bestond else 'opgeslagen'}.")
+                    bestanden = results_store.workbooks(site, jaar)
+                    if len(bestanden) > 1:
+                        st.caption(f"{site} ({int(jaar)}) telt nu {len(bestanden)} workbooks op: {', '.join(str(b) for b in bestanden)}.")
+                else:
+                    st.info("Dit bestand is met dezelfde factoren en keuzes al opgeslagen voor deze site en dit jaar.")
+
+        dfout = pd.DataFrame(rows, columns=RESULTAAT_KOLOMMEN)
+        with profiel.stage("export", rows=len(dfout)):
+            render_export(dfout, "📥 Download resultaten", "CO2_resultaten", key="export_resultaten")
     else:
         st.info("Upload een Excelbestand met de juiste kolommen.")
 
 elif page == "Visualisaties":
+    # Plotly alleen laden als er grafieken getekend worden
+    import plotly.express as px
+    import plotly.graph_objects as go
+
     st.title("Visualisaties")
+    f = st.session_state.uploaded_file
+    streaming = st.session_state.get("streaming_mode", use_streaming(f)) if f else False
+    # Een upload die nog op de achtergrond wordt ingelezen hier niet nog eens synchroon inlezen
+    job = inleesjob(streaming) if f is not None else None
+    status = job.status_for(st.session_state.sessie_id) if job is not None else None
+    ingelezen = status == jobs.KLAAR
     
     # Tabs voor verschillende visualisatie opties
-    tab1, tab2 = st.tabs(["📊 Per Tabblad", "📈 CO₂-Intensiteit Trend"])
+    tab1, tab2, tab3 = st.tabs(["📊 Per Tabblad", "📈 CO₂-Intensiteit Trend", "🎲 Scenario's"])
     
     with tab1:
         st.subheader("Visualisaties per Excel-tabblad")
-        f = st.session_state.uploaded_file
-        if f:
-            xl = pd.ExcelFile(f)
-
-            tabblad_verbruiken = {}
-            tabblad_footprints = {}
-
-            for sheet in xl.sheet_names:
+        if ingelezen:
+            # Hetzelfde ResultsModel als de calculator: zelfde verbruik, factoren en keuzes
+            with profiel.stage("excel_parsen") as stap:
+                consumptions = load_consumption(f, streaming)
+                stap['rows'] = sum(cons.rows for cons in consumptions)
+            with profiel.stage("aggregatie"):
+                model = model_for(st.session_state, f, streaming, factors_from_state(st.session_state), st.session_state.factor_choices)
+                summaries = workbook_summaries(model)
+                totalen = model.sheet_totals()
+
+            for sheet, summary in summaries.items():
                 st.subheader(f"Tabblad: {sheet}")
-                df = xl.parse(sheet)
-
-                # ——— VOOR VERVOER TABBLADEN ———
-                if 'vervoer' in sheet.lower() and all(col in df.columns for col in ['Brandstof', 'Merk', 'Type', 'Brandstof p/j']):
-                    df['Brandstof p/j'] = pd.to_numeric(df['Brandstof p/j'], errors='coerce')
-                    df = df.dropna(subset=['Brandstof p/j'])
-                    top5 = df.sort_values(by='Brandstof p/j', ascending=False).head(5)
-
-                    st.markdown("#### Top 5 hoogste brandstofverbruik")
-                    st.dataframe(
-                        top5[['Merk', 'Type', 'Brandstof', 'Brandstof p/j']].rename(
-                            columns={'Brandstof p/j': 'Verbruik (L)'}
-                        ),
-                        use_container_width=True
-                    )
-
-                    # Totaal verbruik en CO2-footprint voor taartdiagrammen
-                    totaal_verbruik = df['Brandstof p/j'].sum()
-                    tabblad_verbruiken[sheet] = totaal_verbruik
-
-                    # Bepaal factor op basis van eerste rij (simpele benadering)
-                    brandstof = df['Brandstof'].dropna().iloc[0].lower() if not df['Brandstof'].dropna().empty else ''
-                    factor = st.session_state.brandstof_factors.get(brandstof, 0.0)
-                    footprint = totaal_verbruik * factor
-                    tabblad_footprints[sheet] = footprint
-
-                # ——— VOOR ANDERE TABBLADEN MET APPARATEN ———
-                elif all(col in df.columns for col in ['Aantal', 'Vermogen', 'Draaiuren p/j']):
-                    df['Aantal'] = pd.to_numeric(df['Aantal'], errors='coerce')
-                    df['Vermogen'] = pd.to_numeric(df['Vermogen'], errors='coerce')
-                    df['Draaiuren p/j'] = pd.to_numeric(df['Draaiuren p/j'], errors='coerce')
-                    df = df.dropna(subset=['Aantal', 'Vermogen', 'Draaiuren p/j'])
-                    df = df[df['Aantal'] > 0]
-
-                    df['Verbruik'] = (df['Vermogen'] * df['Draaiuren p/j']) / df['Aantal']
-                    df['Type'] = df.get('Type', 'Onbekend')
-                    df['Merk'] = df.get('Merk', 'Onbekend')
-
-                    top5 = df.sort_values(by='Verbruik', ascending=False).head(5)
-
-                    st.markdown("#### Top 5 hoogste verbruik per apparaat")
-                    st.dataframe(
-                        top5[['Merk', 'Type', 'Verbruik']].rename(columns={
-                            'Verbruik': 'Verbruik per apparaat'
-                        }),
-                        use_container_width=True
-                    )
-
-                    # Totaal verbruik = vermogen * draaiuren (over alles)
-                    totaal_verbruik = (df['Vermogen'] * df['Draaiuren p/j']).sum()
-                    tabblad_verbruiken[sheet] = totaal_verbruik
-
-                    # Emissiefactor bepalen op basis van eerste 'Eenheid'
-                    eenheid = df['Eenheid'].dropna().iloc[0] if 'Eenheid' in df.columns and not df['Eenheid'].dropna().empty else None
-                    if eenheid and eenheid in st.session_state.emission_factors:
-                        factor = st.session_state.emission_factors[eenheid]['grijs']  # bijv. 'kWh'
-                    else:
-                        factor = 0.0
-
-                    footprint = totaal_verbruik * factor
-                    tabblad_footprints[sheet] = footprint
-
+                st.markdown(f"#### {summary['titel']}")
+                st.dataframe(summary['top5'], use_container_width=True)
+
+            with profiel.stage("grafieken", rows=len(totalen)):
+                if not totalen.empty:
+                    # ——— TOP 5 VERBRUIK PER TABBLAD ———
+                    st.markdown("#### Top 5 hoogste totaalverbruik per tabblad")
+                    top5_verbruik_df = totalen.nlargest(5, 'Verbruik')[['Tabblad', 'Verbruik']].rename(columns={'Verbruik': 'Totaal verbruik'})
+                    st.dataframe(top5_verbruik_df, use_container_width=True)
+
+                    # ——— TOP 5 CO2-FOOTPRINT PER TABBLAD ———
+                    st.markdown("#### Top 5 hoogste CO₂-footprint per tabblad")
+                    top5_footprint_df = totalen.nlargest(5, 'Footprint')[['Tabblad', 'Footprint']].rename(columns={'Footprint': 'CO2-footprint (kg)'})
+                    st.dataframe(top5_footprint_df, use_container_width=True)
+
+                    # ——— CIRKELDIAGRAM TOTAALVERBRUIK PER TABBLAD ———
+                    st.markdown("### Verhouding totaal verbruik per tabblad")
+                    fig = px.pie(totalen, names='Tabblad', values='Verbruik', hole=0.4)
+                    st.plotly_chart(fig, use_container_width=True)
+
+                    # ——— CIRKELDIAGRAM CO2-FOOTPRINT PER TABBLAD ———
+                    st.markdown("### Verhouding totale CO₂-footprint per tabblad")
+                    fig = px.pie(totalen, names='Tabblad', values='Footprint', hole=0.4)
+                    st.plotly_chart(fig, use_container_width=True)
                 else:
-                    st.warning("Tabblad heeft geen herkenbare structuur.")
-
-            # ——— TOP 5 VERBRUIK PER TABBLAD ———
-            if tabblad_verbruiken:
-                st.markdown("#### Top 5 hoogste totaalverbruik per tabblad")
-                # Maak een DataFrame voor de tabblad verbruiken en sorteer op verbruik
-                top5_verbruik_df = pd.DataFrame({
-                    'Tabblad': list(tabblad_verbruiken.keys()),
-                    'Totaal verbruik': list(tabblad_verbruiken.values())
-                }).sort_values(by='Totaal verbruik', ascending=False).head(5)
-
-                st.dataframe(top5_verbruik_df, use_container_width=True)
-
-            # ——— TOP 5 CO2-FOOTPRINT PER TABBLAD ———
-            if tabblad_footprints:
-                st.markdown("#### Top 5 hoogste CO₂-footprint per tabblad")
-                # Maak een DataFrame voor de tabblad footprints en sorteer op CO₂-footprint
-                top5_footprint_df = pd.DataFrame({
-                    'Tabblad': list(tabblad_footprints.keys()),
-                    'CO2-footprint (kg)': list(tabblad_footprints.values())
-                }).sort_values(by='CO2-footprint (kg)', ascending=False).head(5)
-
-                st.dataframe(top5_footprint_df, use_container_width=True)
-
-            # ——— CIRKELDIAGRAM TOTAALVERBRUIK PER TABBLAD ———
-            if tabblad_verbruiken:
-                st.markdown("### Verhouding totaal verbruik per tabblad")
-                chart_df = pd.DataFrame({
-                    'Tabblad': list(tabblad_verbruiken.keys()),
-                    'Totaal verbruik': list(tabblad_verbruiken.values())
-                })
-                fig = px.pie(chart_df, names='Tabblad', values='Totaal verbruik', hole=0.4)
-                st.plotly_chart(fig, use_container_width=True)
-
-            # ——— CIRKELDIAGRAM CO2-FOOTPRINT PER TABBLAD ———
-            if tabblad_footprints:
-                st.markdown("### Verhouding totale CO₂-footprint per tabblad")
-                footprint_df = pd.DataFrame({
-                    'Tabblad': list(tabblad_footprints.keys()),
-                    'CO2-footprint (kg)': list(tabblad_footprints.values())
-                })
-                fig = px.pie(footprint_df, names='Tabblad', values='CO2-footprint (kg)', hole=0.4)
-                st.plotly_chart(fig, use_container_width=True)
+                    st.warning("Geen tabbladen met een herkenbare structuur gevonden.")
 
+        elif f:
+            job_melding(status)
         else:
             st.info("Upload eerst een Excelbestand via de CO₂ Calculator-pagina.")
     
     with tab2:
         st.subheader("CO₂-Intensiteit Trend Analyse")
-        st.markdown("Upload een Excel-bestand met de volgende kolommen: **Jaar**, **Omzet (miljoenen)**, **Co2-Footprint (ton)**")
-        
-        # Upload voor CO2-intensiteit data
-        intensity_file = st.file_uploader(
-            "Upload Excel voor CO₂-intensiteit analyse", 
-            type=["xlsx"], 
-            key="intensity_uploader"
-        )
+        bron = st.radio("Bron", ["Upload", "Historie"], horizontal=True, key="intensity_bron")
+        intensity_file = None
+        history_df = None
+
+        if bron == "Historie":
+            # Jaar/CO₂-reeks direct uit de resultatenstore; omzet per site/jaar hier invullen
+            gekozen = st.multiselect("Sites", results_store.sites(), key="intensity_sites")
+            omzet_df = st.data_editor(
+                results_store.omzet_table(gekozen),
+                disabled=['Site', 'Jaar'],
+                hide_index=True,
+                use_container_width=True,
+                key="intensity_omzet",
+            )
+            if st.button("Omzet opslaan"):
+                results_store.save_omzet(omzet_df)
+            history_df = results_store.yearly_series(gekozen)
+            zonder_omzet = int(omzet_df['Omzet (miljoen €)'].isna().sum())
+            if zonder_omzet:
+                st.caption(f"{zonder_omzet} site/jaar-combinaties zonder omzet tellen niet mee in de intensiteit.")
+            if history_df.empty:
+                history_df = None
+        else:
+            st.markdown("Upload een Excel-, CSV- of Parquet-bestand met de volgende kolommen: **Jaar**, **Omzet (miljoenen)**, **Co2-Footprint (ton)**. "
+                        "De periode mag ook een maand of datum zijn; een kolom **Site** of **Entiteit** is optioneel.")
+
+            # Upload voor CO2-intensiteit data; net als de werkmap alleen in de gedeelde store bewaard
+            intensity_upload = st.file_uploader(
+                "Upload bestand voor CO₂-intensiteit analyse", 
+                type=intensity.BESTANDSTYPEN, 
+                key=f"intensity_uploader_{st.session_state.intensity_versie}"
+            )
+            if intensity_upload:
+                try:
+                    st.session_state.intensity_upload = store_upload(intensity_upload)
+                except MemoryError as e:
+                    st.error(str(e))
+                else:
+                    upload_loslaten(intensity_upload)
+                    st.session_state.intensity_versie += 1
+                    st.rerun()
+            intensity_file = st.session_state.intensity_upload
+            if intensity_file is not None:
+                st.caption(f"Bestand: {intensity_file.name} ({intensity_file.size / 2**20:,.1f} MB)")
         
-        if intensity_file:
+        if intensity_file or history_df is not None:
             try:
-                # Lees het Excel bestand
-                df_intensity = pd.read_excel(intensity_file)
-                
-                # Verwachte kolomnamen (flexibel voor variaties met veel substrings)
-                jaar_substrings = ['jaar', 'year', 'periode', 'datum', 'date', 'time', 'tijd', 'boekjaar']
-                omzet_substrings = ['omzet', 'revenue', 'turnover', 'sales', 'verkoop', 'inkomsten', 'opbrengst', 'netto', 'bruto', 'facturatie', 'totaal']
-                co2_substrings = ['co2', 'co₂', 'footprint', 'uitstoot', 'emissie', 'carbon', 'koolstof', 'milieu', 'duurzaam', 'klimaat', 'scope', 'ghg', 'greenhouse']
-                
-                jaar_cols = [col for col in df_intensity.columns if any(substring in col.lower() for substring in jaar_substrings)]
-                omzet_cols = [col for col in df_intensity.columns if any(substring in col.lower() for substring in omzet_substrings)]
-                co2_cols = [col for col in df_intensity.columns if any(substring in col.lower() for substring in co2_substrings)]
+                # Lees het bestand (per inhoud één keer) en zoek de kolommen
+                with profiel.stage("intensiteit_inlezen") as stap:
+                    if intensity_file:
+                        df_clean, kolommen = intensity.load_series(intensity_file)
+                    else:
+                        kolommen = intensity.find_columns(history_df)
+                        df_clean = intensity.clean_series(history_df, kolommen) if kolommen else None
+                        if df_clean is None:
+                            kolommen = list(history_df.columns)
+                    stap['rows'] = 0 if df_clean is None else len(df_clean)
                 
-                if not jaar_cols or not omzet_cols or not co2_cols:
+                if df_clean is None:
                     st.error("⚠️ Controleer of het bestand de juiste kolommen heeft: Jaar, Omzet (miljoenen), Co2-Footprint (ton)")
-                    st.write("Gevonden kolommen:", list(df_intensity.columns))
+                    st.write("Gevonden kolommen:", kolommen)
+                elif df_clean.empty:
+                    st.error("Geen geldige data gevonden na het opschonen.")
                 else:
-                    # Gebruik de eerste gevonden kolom van elk type
-                    jaar_col = jaar_cols[0]
-                    omzet_col = omzet_cols[0]
-                    co2_col = co2_cols[0]
-                    
-                    # Data cleanup
-                    df_clean = df_intensity[[jaar_col, omzet_col, co2_col]].copy()
-                    df_clean.columns = ['Jaar', 'Omzet_miljoen', 'CO2_ton']
-                    
-                    # Converteer naar numeriek
-                    df_clean['Jaar'] = pd.to_numeric(df_clean['Jaar'], errors='coerce')
-                    df_clean['Omzet_miljoen'] = pd.to_numeric(df_clean['Omzet_miljoen'], errors='coerce')
-                    df_clean['CO2_ton'] = pd.to_numeric(df_clean['CO2_ton'], errors='coerce')
-                    
-                    # Verwijder rijen met NaN waarden
-                    df_clean = df_clean.dropna()
-                    
-                    if df_clean.empty:
-                        st.error("Geen geldige data gevonden na het opschonen.")
+                    # Eén regel per periode (entiteiten opgeteld) voor trend en samenvatting
+                    reeks = intensity.period_series(df_clean)
+                    groot = intensity.is_large(df_clean)
+                    datums = pd.api.types.is_datetime64_any_dtype(reeks['Jaar'])
+                    periode_label = 'Periode' if datums else 'Jaar'
+
+                    # Toon de data
+                    st.markdown("### Gegevensoverzicht")
+                    display_df = df_clean.copy()
+                    display_df['CO2_Intensiteit'] = display_df['CO2_Intensiteit'].round(3)
+                    display_df = display_df.rename(columns={
+                        'Jaar': periode_label,
+                        'Omzet_miljoen': 'Omzet (miljoen €)',
+                        'CO2_ton': 'CO₂-Footprint (ton)',
+                        'CO2_Intensiteit': 'CO₂-Intensiteit (ton/miljoen €)',
+                    })
+                    if groot:
+                        st.dataframe(display_df.head(1000), use_container_width=True)
+                        st.caption(f"Eerste 1.000 van {len(display_df):,} regels; de download bevat alles.")
                     else:
-                        # Bereken CO2-intensiteit (ton CO2 per miljoen euro omzet)
-                        df_clean['CO2_Intensiteit'] = df_clean['CO2_ton'] / df_clean['Omzet_miljoen']
-                        
-                        # Sorteer op jaar
-                        df_clean = df_clean.sort_values('Jaar')
-                        
-                        # Toon de data
-                        st.markdown("### Gegevensoverzicht")
-                        display_df = df_clean.copy()
-                        display_df['CO2_Intensiteit'] = display_df['CO2_Intensiteit'].round(3)
-                        display_df.columns = ['Jaar', 'Omzet (miljoen €)', 'CO₂-Footprint (ton)', 'CO₂-Intensiteit (ton/miljoen €)']
                         st.dataframe(display_df, use_container_width=True)
-                        
-                        # Visualisaties
+
+                    # Visualisaties
+                    with profiel.stage("grafieken", rows=len(df_clean)):
+                        zicht = reeks
+                        bereik = None
+                        if len(reeks) > intensity.MAX_PLOT_POINTS:
+                            # Zoomen: het gekozen venster wordt opnieuw gedownsampled, dus meer detail bij inzoomen
+                            lo, hi = reeks['Jaar'].iloc[0], reeks['Jaar'].iloc[-1]
+                            lo, hi = (lo.to_pydatetime(), hi.to_pydatetime()) if datums else (lo.item(), hi.item())
+                            bereik = st.slider(f"Zoom ({periode_label})", min_value=lo, max_value=hi, value=(lo, hi), key="intensity_zoom")
+                            zicht = intensity.window(reeks, *bereik)
+
+                        entiteiten = []
+                        if 'Entiteit' in df_clean.columns:
+                            entiteiten = st.multiselect("Entiteiten apart tonen", sorted(df_clean['Entiteit'].unique()), key="intensity_entiteiten")
+
+                        # WebGL-traces voor grote reeksen; de browser krijgt nooit meer dan MAX_PLOT_POINTS per lijn
+                        Scatter = go.Scattergl if groot else go.Scatter
                         col1, col2 = st.columns(2)
-                        
+                    
                         with col1:
                             st.markdown("### CO₂-Intensiteit Trend")
+                            punten = intensity.downsample(zicht, 'CO2_Intensiteit')
                             fig_trend = go.Figure()
-                            fig_trend.add_trace(go.Scatter(
-                                x=df_clean['Jaar'],
-                                y=df_clean['CO2_Intensiteit'],
-                                mode='lines+markers',
+                            fig_trend.add_trace(Scatter(
+                                x=punten['Jaar'],
+                                y=punten['CO2_Intensiteit'],
+                                mode='lines' if groot else 'lines+markers',
                                 name='CO₂-Intensiteit',
                                 line=dict(color='#FF6B6B', width=3),
                                 marker=dict(size=8)
                             ))
+                            for naam in entiteiten:
+                                per_entiteit = df_clean[df_clean['Entiteit'] == naam]
+                                if bereik is not None:
+                                    per_entiteit = intensity.window(per_entiteit, *bereik)
+                                per_entiteit = intensity.downsample(per_entiteit, 'CO2_Intensiteit')
+                                fig_trend.add_trace(Scatter(
+                                    x=per_entiteit['Jaar'],
+                                    y=per_entiteit['CO2_Intensiteit'],
+                                    mode='lines',
+                                    name=naam
+                                ))
                             fig_trend.update_layout(
-                                title="CO₂-Intensiteit over de jaren",
-                                xaxis_title="Jaar",
+                                title="CO₂-Intensiteit over de jaren" if not datums else "CO₂-Intensiteit over de tijd",
+                                xaxis_title=periode_label,
                                 yaxis_title="CO₂-Intensiteit (ton CO₂/miljoen €)",
                                 hovermode='x unified'
                             )
                             st.plotly_chart(fig_trend, use_container_width=True)
-                            
+                        
                         with col2:
                             st.markdown("### Omzet vs CO₂-Footprint")
+                            punten = intensity.downsample(zicht, 'CO2_ton', x='Omzet_miljoen')
                             fig_scatter = go.Figure()
-                            fig_scatter.add_trace(go.Scatter(
-                                x=df_clean['Omzet_miljoen'],
-                                y=df_clean['CO2_ton'],
-                                mode='markers+text',
-                                text=df_clean['Jaar'].astype(str),
+                            fig_scatter.add_trace(Scatter(
+                                x=punten['Omzet_miljoen'],
+                                y=punten['CO2_ton'],
+                                mode='markers' if groot else 'markers+text',
+                                text=None if groot else punten['Jaar'].astype(str),
                                 textposition="top center",
-                                name='Jaardata',
-                                marker=dict(size=12, color='#4ECDC4')
+                                name='Jaardata' if not datums else 'Periodedata',
+                                marker=dict(size=12 if not groot else 6, color='#4ECDC4')
                             ))
                             fig_scatter.update_layout(
-                                title="Omzet vs CO₂-Footprint per jaar",
+                                title="Omzet vs CO₂-Footprint per jaar" if not datums else "Omzet vs CO₂-Footprint per periode",
                                 xaxis_title="Omzet (miljoen €)",
                                 yaxis_title="CO₂-Footprint (ton)"
                             )
                             st.plotly_chart(fig_scatter, use_container_width=True)
+                    
+                    # Analyse samenvatting
+                    st.markdown("### Analyse Samenvatting")
+                    
+                    samenvatting = intensity.summary(reeks)
+                    if samenvatting is not None:
+                        start_intensiteit = samenvatting['start']
+                        eind_intensiteit = samenvatting['eind']
+                        verandering_pct = samenvatting['verandering_pct']
                         
-                        # Analyse samenvatting
-                        st.markdown("### Analyse Samenvatting")
+                        col1, col2, col3, col4 = st.columns(4)
                         
-                        if len(df_clean) > 1:
-                            start_intensiteit = df_clean.iloc[0]['CO2_Intensiteit']
-                            eind_intensiteit = df_clean.iloc[-1]['CO2_Intensiteit']
-                            verandering_pct = ((eind_intensiteit - start_intensiteit) / start_intensiteit) * 100
-                            
-                            col1, col2, col3, col4 = st.columns(4)
-                            
-                            with col1:
-                                st.metric(
-                                    "Huidige CO₂-Intensiteit", 
-                                    f"{eind_intensiteit:.3f} ton/M€"
-                                )
-                            
-                            with col2:
-                                st.metric(
-                                    "Startwaarde", 
-                                    f"{start_intensiteit:.3f} ton/M€"
-                                )
-                            
-                            with col3:
-                                st.metric(
-                                    "Verandering (%)", 
-                                    f"{verandering_pct:+.1f}%",
-                                    delta=f"{verandering_pct:+.1f}%"
-                                )
-                            
-                            with col4:
-                                beste_jaar = df_clean.loc[df_clean['CO2_Intensiteit'].idxmin(), 'Jaar']
-                                beste_waarde = df_clean['CO2_Intensiteit'].min()
-                                st.metric(
-                                    f"Beste jaar ({int(beste_jaar)})", 
-                                    f"{beste_waarde:.3f} ton/M€"
-                                )
-                            
-                            # Interpretatie
-                            st.markdown("### Interpretatie")
-                            if verandering_pct < -5:
-                                st.success("✅ **Uitstekend!** Je CO₂-intensiteit is significant gedaald. Dit betekent dat je bedrijf veel efficiënter is geworden.")
-                            elif verandering_pct < 0:
-                                st.success("✅ **Goed!** Je CO₂-intensiteit is gedaald. Je bedrijf wordt groener.")
-                            elif verandering_pct < 5:
-                                st.warning("⚠️ **Stabiel.** Je CO₂-intensiteit is relatief stabiel gebleven.")
-                            else:
-                                st.error("❌ **Aandacht vereist.** Je CO₂-intensiteit is gestegen. Overweeg duurzaamheidsmaatregelen.")
+                        with col1:
+                            st.metric(
+                                "Huidige CO₂-Intensiteit", 
+                                f"{eind_intensiteit:.3f} ton/M€"
+                            )
+                        
+                        with col2:
+                            st.metric(
+                                "Startwaarde", 
+                                f"{start_intensiteit:.3f} ton/M€"
+                            )
+                        
+                        with col3:
+                            st.metric(
+                                "Verandering (%)", 
+                                f"{verandering_pct:+.1f}%",
+                                delta=f"{verandering_pct:+.1f}%"
+                            )
                         
-                        # Download optie
-                        buf = BytesIO()
-                        with pd.ExcelWriter(buf, engine='openpyxl') as writer:
-                            display_df.to_excel(writer, index=False, sheet_name='CO2_Intensiteit_Analyse')
-                        buf.seek(0)
+                        with col4:
+                            beste = samenvatting['beste_periode']
+                            st.metric(
+                                f"Beste periode ({beste:%Y-%m-%d})" if datums else f"Beste jaar ({int(beste)})", 
+                                f"{samenvatting['beste_waarde']:.3f} ton/M€"
+                            )
                         
-                        st.download_button(
-                            "📥 Download CO₂-intensiteit analyse",
-                            data=buf,
-                            file_name="CO2_intensiteit_analyse.xlsx",
-                            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                        )
+                        # Interpretatie
+                        st.markdown("### Interpretatie")
+                        if verandering_pct < -5:
+                            st.success("✅ **Uitstekend!** Je CO₂-intensiteit is significant gedaald. Dit betekent dat je bedrijf veel efficiënter is geworden.")
+                        elif verandering_pct < 0:
+                            st.success("✅ **Goed!** Je CO₂-intensiteit is gedaald. Je bedrijf wordt groener.")
+                        elif verandering_pct < 5:
+                            st.warning("⚠️ **Stabiel.** Je CO₂-intensiteit is relatief stabiel gebleven.")
+                        else:
+                            st.error("❌ **Aandacht vereist.** Je CO₂-intensiteit is gestegen. Overweeg duurzaamheidsmaatregelen.")
+                    
+                    # Download optie
+                    render_export(display_df, "📥 Download CO₂-intensiteit analyse", "CO2_intensiteit_analyse",
+                                  key="export_intensiteit", sheet_name='CO2_Intensiteit_Analyse')
                         
+            except UploadEvicted:
+                st.session_state.intensity_upload = None
+                st.warning("Het intensiteitsbestand is uit het geheugen verwijderd; upload het opnieuw.")
             except Exception as e:
                 st.error(f"Fout bij het verwerken van het bestand: {str(e)}")
-                st.info("Zorg ervoor dat het Excel-bestand de juiste kolommen heeft: Jaar, Omzet (miljoenen), Co2-Footprint (ton)")
+                st.info("Zorg ervoor dat het bestand de juiste kolommen heeft: Jaar, Omzet (miljoenen), Co2-Footprint (ton)")
         
+        elif bron == "Historie":
+            st.info("📁 Nog geen resultaten in de historie. Sla ze op via de CO₂ Calculator-pagina.")
+        else:
+            st.info("📁 Upload een Excel-, CSV- of Parquet-bestand om de CO₂-intensiteit trend te analyseren.")
+
+    with tab3:
+        st.subheader("Scenario's en onzekerheid")
+        if ingelezen:
+            factors = factors_from_state(st.session_state)
+            with profiel.stage("scenario_model") as stap:
+                scenario_model = ScenarioModel(load_consumption(f, streaming), factors, st.session_state.factor_choices)
+                stap['rows'] = len(scenario_model.slots)
+
+            if not scenario_model.slots:
+                st.warning("Geen tabbladen met een herkenbare structuur gevonden.")
+            else:
+                # ——— VASTE SCENARIO'S ———
+                st.markdown("### Vaste scenario's")
+                named = scenario_model.named(factors)
+                named_totals = scenario_model.evaluate(np.array(list(named.values())))
+                named_df = pd.DataFrame({'Scenario': list(named), 'CO2-footprint (kg)': named_totals})
+                named_df['Verschil t.o.v. huidig (kg)'] = named_df['CO2-footprint (kg)'] - named_totals[0]
+                st.dataframe(named_df, hide_index=True, use_container_width=True)
+
+                # ——— MONTE CARLO ———
+                st.markdown("### Onzekerheid in emissiefactoren")
+                scols = st.columns(3)
+                pct = scols[0].slider("Standaardbereik (± %)", 0, 100, 10, key="scenario_pct")
+                aantal = scols[1].number_input("Aantal scenario's", min_value=100, max_value=MAX_SCENARIOS, value=5000, step=100, key="scenario_aantal")
+                seed = scols[2].number_input("Seed", min_value=0, value=0, step=1, key="scenario_seed")
+                ranges = st.data_editor(
+                    scenario_model.ranges(pct),
+                    column_config={
+                        'Huidig': st.column_config.NumberColumn(format="%.4f"),
+                        'Laag': st.column_config.NumberColumn(format="%.4f"),
+                        'Hoog': st.column_config.NumberColumn(format="%.4f"),
+                    },
+                    disabled=['Factor', 'Huidig'],
+                    hide_index=True,
+                    use_container_width=True,
+                    # Nieuw standaardbereik = nieuwe tabel; handmatige aanpassingen horen bij één bereik
+                    key=f"scenario_ranges_{pct}",
+                )
+
+                with profiel.stage("scenario_berekening", rows=int(aantal)):
+                    samples = scenario_model.sample(ranges, aantal, seed=int(seed))
+                    totals = scenario_model.evaluate(samples)
+                    per_sheet = scenario_model.evaluate_sheets(samples)
+                    p_low, p_mid, p_high = bands(totals)
+                    sheet_bands = bands(per_sheet)
+
+                mcols = st.columns(3)
+                mcols[0].metric(f"P{PERCENTIELEN[0]}", f"{p_low:,.0f} kg CO₂")
+                mcols[1].metric(f"Mediaan (P{PERCENTIELEN[1]})", f"{p_mid:,.0f} kg CO₂")
+                mcols[2].metric(f"P{PERCENTIELEN[2]}", f"{p_high:,.0f} kg CO₂")
+
+                with profiel.stage("scenario_grafieken"):
+                    gcols = st.columns(2)
+                    with gcols[0]:
+                        st.markdown("#### Verdeling totale footprint")
+                        fig = px.histogram(x=totals, nbins=60, labels={'x': "CO₂-footprint (kg)"})
+                        for waarde in (p_low, p_mid, p_high):
+                            fig.add_vline(x=waarde, line_dash="dash", line_color="#FF6B6B")
+                        fig.update_layout(yaxis_title="Aantal scenario's", showlegend=False)
+                        st.plotly_chart(fig, use_container_width=True)
+                    with gcols[1]:
+                        st.markdown(f"#### Bandbreedte per tabblad (P{PERCENTIELEN[0]}–P{PERCENTIELEN[2]})")
+                        fig = go.Figure(go.Bar(
+                            x=scenario_model.sheets,
+                            y=sheet_bands[1],
+                            error_y=dict(type='data', symmetric=False,
+                                         array=sheet_bands[2] - sheet_bands[1],
+                                         arrayminus=sheet_bands[1] - sheet_bands[0]),
+                            marker_color='#4ECDC4',
+                        ))
+                        fig.update_layout(xaxis_title="Tabblad", yaxis_title="CO₂-footprint (kg)")
+                        st.plotly_chart(fig, use_container_width=True)
+
+                bands_df = pd.DataFrame({
+                    'Tabblad': scenario_model.sheets + ['Totaal'],
+                    f'P{PERCENTIELEN[0]}': list(sheet_bands[0]) + [p_low],
+                    f'P{PERCENTIELEN[1]}': list(sheet_bands[1]) + [p_mid],
+                    f'P{PERCENTIELEN[2]}': list(sheet_bands[2]) + [p_high],
+                })
+                render_export(bands_df, "📥 Download bandbreedtes", "CO2_scenario_bandbreedtes",
+                              key="export_scenarios", sheet_name='Scenario_bandbreedtes')
+        elif f:
+            job_melding(status)
         else:
-            st.info("📁 Upload een Excel-bestand om de CO₂-intensiteit trend te analyseren.")
\ No newline at end of file
+            st.info("Upload eerst een Excelbestand via de CO₂ Calculator-pagina.")
+
+zijbalk_afronden()
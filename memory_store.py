@@ -0,0 +1,161 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+from dataclasses import fields, is_dataclass
+
+import pandas as pd
+
+# Geheugenbudget (MB) voor alle gedeelde caches samen, per proces en over alle sessies
+MEMORY_BUDGET_MB = float(os.environ.get("MAKITATOOL_MEMORY_BUDGET_MB", "1024"))
+
+
+def size_of(value):
+    """Geschatte grootte in bytes: DataFrames via memory_usage(deep=True), bytes via len()."""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return len(value)
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True, index=True).sum())
+    if isinstance(value, (pd.Series, pd.Index)):
+        return int(value.memory_usage(deep=True))
+    if hasattr(value, "nbytes"):
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(size_of(k) + size_of(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(size_of(v) for v in value)
+    if is_dataclass(value) and not isinstance(value, type):
+        return sys.getsizeof(value) + sum(size_of(getattr(value, f.name)) for f in fields(value))
+    return sys.getsizeof(value)
+
+
+class MemoryStore:
+    """Thread-veilige cache met een budget in bytes; de minst recent gebruikte waarden vallen eruit.
+
+    Sleutels zijn (namespace, sleutel); elke inhoud staat er één keer in, voor alle sessies.
+    Buiten het budget vallen de jobregistratie in jobs.py (die ook de bytes van een lopende
+    job vasthoudt) en wat sessies zelf in session_state bewaren (het ResultsModel).
+    """
+
+    def __init__(self, budget_bytes):
+        self.budget = int(budget_bytes)
+        self.used = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._data.move_to_end(key)
+            return self._data[key][0]
+
+    def put(self, key, value, size=None):
+        """Bewaart `value`; False als de waarde in zijn eentje al groter is dan het budget."""
+        size = size_of(value) if size is None else int(size)
+        with self._lock:
+            self._remove(key)
+            if size > self.budget:
+                return False
+            self._data[key] = (value, size)
+            self.used += size
+            while self.used > self.budget:
+                _, (_, evicted) = self._data.popitem(last=False)
+                self.used -= evicted
+                self.evictions += 1
+            return True
+
+    def _remove(self, key):
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self.used -= entry[1]
+
+    def discard(self, key):
+        with self._lock:
+            self._remove(key)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+    def clear(self, namespace=None):
+        with self._lock:
+            for key in [k for k in self._data if namespace is None or k[0] == namespace]:
+                self._remove(key)
+
+    def namespace(self, name):
+        return _Namespace(self, name)
+
+    def stats(self):
+        """Aantal waarden en bytes per namespace, grootste eerst."""
+        with self._lock:
+            per_namespace = {}
+            for (name, _), (_, size) in self._data.items():
+                entries, total = per_namespace.get(name, (0, 0))
+                per_namespace[name] = (entries + 1, total + size)
+        return sorted(((name, n, total) for name, (n, total) in per_namespace.items()), key=lambda t: -t[2])
+
+
+class _Namespace:
+    """Deel van de store met dezelfde interface als LRUCache."""
+
+    def __init__(self, store, name):
+        self.store = store
+        self.name = name
+
+    def get(self, key, default=None):
+        return self.store.get((self.name, key), default)
+
+    def put(self, key, value, size=None):
+        return self.store.put((self.name, key), value, size)
+
+    def discard(self, key):
+        self.store.discard((self.name, key))
+
+    def __contains__(self, key):
+        return (self.name, key) in self.store
+
+    def __len__(self):
+        return sum(n for name, n, _ in self.store.stats() if name == self.name)
+
+    def clear(self):
+        self.store.clear(self.name)
+
+
+store = MemoryStore(MEMORY_BUDGET_MB * 2**20)
+
+
+def _process_rss():
+    # Huidig geheugen van het proces (Linux); None als /proc niet beschikbaar is
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def render_panel(container):
+    """Inklapbaar overzicht van het gedeelde geheugen in `container` (bv. st.sidebar)."""
+    panel = container.expander("🧠 Geheugen", expanded=False)
+    mb = 2**20
+    panel.metric("Gedeelde store", f"{store.used / mb:,.1f} / {store.budget / mb:,.0f} MB")
+    panel.progress(min(store.used / store.budget, 1.0) if store.budget else 0.0)
+    rows = pd.DataFrame(
+        [{"Soort": name, "Items": n, "MB": round(total / mb, 2)} for name, n, total in store.stats()],
+        columns=["Soort", "Items", "MB"],
+    )
+    panel.dataframe(rows, hide_index=True, use_container_width=True)
+    rss = _process_rss()
+    panel.caption(
+        f"Hits {store.hits} · missers {store.misses} · verwijderd {store.evictions}"
+        + (f" · proces {rss / mb:,.0f} MB" if rss is not None else "")
+    )
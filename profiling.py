@@ -0,0 +1,77 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+# Profiler standaard aan met MAKITATOOL_PROFILE=1; anders per sessie via de sidebar
+PROFILE_DEFAULT = os.environ.get("MAKITATOOL_PROFILE", "0") == "1"
+PROFILE_LOG = Path(os.environ.get("MAKITATOOL_PROFILE_LOG", Path.home() / ".cache" / "makitatool" / "profile_log.jsonl"))
+
+_log_lock = threading.Lock()
+
+
+class RerunProfile:
+    """Tijden en rijaantallen per stap van één Streamlit-rerun."""
+
+    def __init__(self, page, session_id=None, log_path=PROFILE_LOG):
+        self.page = page
+        self.session_id = session_id
+        self.log_path = Path(log_path)
+        self.stages = []
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        # Het record kan binnen het blok nog worden aangevuld, bv. record['rows'] = len(df)
+        record = {"stage": name, "rows": rows}
+        t0 = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["seconds"] = round(time.perf_counter() - t0, 4)
+            self.stages.append(record)
+
+    def finish(self):
+        record = {
+            "ts": datetime.now().isoformat(timespec="milliseconds"),
+            "session": self.session_id,
+            "page": self.page,
+            "total_seconds": round(time.perf_counter() - self._start, 4),
+            "stages": self.stages,
+        }
+        self.log_path.parent.mkdir(parents=True, exist_ok=True)
+        with _log_lock, open(self.log_path, "a", encoding="utf-8") as fh:
+            fh.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        return record
+
+
+class _NullProfile:
+    @contextmanager
+    def stage(self, name, rows=None):
+        yield {}
+
+    def finish(self):
+        return None
+
+
+def start_rerun(enabled, page, session_id=None):
+    return RerunProfile(page, session_id) if enabled else _NullProfile()
+
+
+def render_panel(container, record):
+    """Inklapbaar overzicht van de rerun in `container` (bv. st.sidebar)."""
+    if record is None:
+        return
+    panel = container.expander("⏱️ Profiel van deze rerun", expanded=False)
+    panel.metric("Totaal", f"{record['total_seconds'] * 1000:.0f} ms")
+    stages = pd.DataFrame(
+        [{"Stap": s["stage"], "ms": round(s["seconds"] * 1000, 1), "Rijen": s.get("rows")} for s in record["stages"]],
+        columns=["Stap", "ms", "Rijen"],
+    )
+    panel.dataframe(stages, hide_index=True, use_container_width=True)
+    panel.caption(f"Pagina: {record['page']} · log: {PROFILE_LOG}")
@@ -0,0 +1,139 @@
+import pandas as pd
+
+from co2_engine import RESULTAAT_KOLOMMEN, TOP_ROWS, choice_options, consumption_rows, equipment_factor, workbook_consumption
+from streaming_reader import stream_consumption
+from memory_store import store
+from workbook_cache import load_workbook, source_key
+
+TABEL_KOLOMMEN = RESULTAAT_KOLOMMEN + ['Tabblad', 'Keuze']
+
+# Verbruik per tabblad hangt niet af van de factoren: één keer per inhoud berekenen
+_consumptions = store.namespace("verbruik")
+
+
+def load_consumption(source, streaming=False):
+    key = (source_key(source), streaming)
+    consumptions = _consumptions.get(key)
+    if consumptions is None:
+        consumptions = stream_consumption(source) if streaming else workbook_consumption(load_workbook(source))
+        _consumptions.put(key, consumptions)
+    return consumptions
+
+
+def cached_consumption(key, streaming):
+    return _consumptions.get((key, streaming))
+
+
+def remember_consumption(key, streaming, consumptions):
+    """Resultaat van een achtergrondjob, zodat load_consumption het direct terugvindt."""
+    _consumptions.put((key, streaming), consumptions)
+
+
+class ResultsModel:
+    """Resultaattabel van één workbook die per tabblad wordt bijgewerkt.
+
+    Het verbruik ligt vast; bij een andere factor of keuze wordt alleen het betrokken
+    tabblad opnieuw vermenigvuldigd en het totaal gecorrigeerd. Calculator en
+    Visualisaties lezen allebei uit dit model.
+    """
+
+    def __init__(self, consumptions, factors, choices):
+        self.consumptions = consumptions
+        self._by_sheet = {cons.sheet: cons for cons in consumptions}
+        self._signatures = {}
+        self._positions = {}
+        self._totals = {}
+        parts = []
+        for cons in consumptions:
+            choice, signature = self._resolve(cons, factors, choices.get(cons.sheet))
+            rows = self._rows(cons, factors, choice)
+            self._positions[cons.sheet] = (len(parts), len(parts) + len(rows))
+            self._signatures[cons.sheet] = signature
+            self._totals[cons.sheet] = sum(r['Footprint'] for r in rows)
+            parts.extend(rows)
+        self.table = pd.DataFrame(parts, columns=TABEL_KOLOMMEN)
+        self.total = sum(self._totals.values())
+
+    @staticmethod
+    def _resolve(cons, factors, choice):
+        # Handtekening: alles waar de footprint van dit tabblad van afhangt
+        if cons.kind == 'apparaten':
+            options = choice_options(cons.unit, factors)
+            if options and choice not in options:
+                choice = options[0]
+            return (choice if options else None), ('apparaten', choice, equipment_factor(cons.unit, factors, choice))
+        index = factors.get("factor_index")
+        return None, ('vervoer', factors["elekfactor"], tuple(factors["brandstof_factors"].items()),
+                      index.source_hash if index is not None else None)
+
+    @staticmethod
+    def _rows(cons, factors, choice):
+        rows = consumption_rows(cons, factors, choice)
+        for row in rows:
+            row['Tabblad'] = cons.sheet
+            row['Keuze'] = choice
+        return rows
+
+    def update_sheet(self, cons, factors, choice):
+        """Werkt één tabblad bij als de factor of keuze veranderd is; geeft True bij een wijziging."""
+        choice, signature = self._resolve(cons, factors, choice)
+        if self._signatures.get(cons.sheet) == signature:
+            return False
+        rows = self._rows(cons, factors, choice)
+        start, end = self._positions[cons.sheet]
+        cols = [self.table.columns.get_loc(c) for c in ('Eenheid', 'Emissiefactor', 'Footprint', 'Keuze')]
+        self.table.iloc[start:end, cols] = [[r['Eenheid'], r['Emissiefactor'], r['Footprint'], r['Keuze']] for r in rows]
+        new_total = sum(r['Footprint'] for r in rows)
+        self.total += new_total - self._totals[cons.sheet]
+        self._totals[cons.sheet] = new_total
+        self._signatures[cons.sheet] = signature
+        return True
+
+    def update(self, factors, choices):
+        return [cons.sheet for cons in self.consumptions if self.update_sheet(cons, factors, choices.get(cons.sheet))]
+
+    def sheet_rows(self, sheet):
+        start, end = self._positions[sheet]
+        return self.table.iloc[start:end][RESULTAAT_KOLOMMEN].to_dict('records')
+
+    def rows(self):
+        return self.table[RESULTAAT_KOLOMMEN].to_dict('records')
+
+    def footprint(self, sheet):
+        return self._totals[sheet]
+
+    def sheet_totals(self):
+        """Verbruik en footprint per tabblad, in workbookvolgorde."""
+        return pd.DataFrame({
+            'Tabblad': [cons.sheet for cons in self.consumptions],
+            'Verbruik': [cons.total_verbruik for cons in self.consumptions],
+            'Footprint': [self._totals[cons.sheet] for cons in self.consumptions],
+        })
+
+    def top_rows(self, sheet, n=TOP_ROWS):
+        """De `n` regels van `sheet` met het hoogste verbruik, met de factor uit de tabel en hun footprint."""
+        cons = self._by_sheet[sheet]
+        start, end = self._positions[sheet]
+        factor = self.table['Emissiefactor'].iloc[start:end]
+        if cons.top is None:
+            return pd.DataFrame(columns=['Merk', 'Type', 'Verbruik', 'Emissiefactor', 'Footprint'])
+        top = cons.top.nlargest(n, 'Verbruik')
+        if cons.kind == 'vervoer':
+            # Tabelregels van een vervoer-tabblad staan in dezelfde volgorde als cons.labels
+            emissiefactor = top['Brandstof'].map(dict(zip(cons.labels, factor))).fillna(0.0)
+        else:
+            emissiefactor = factor.iloc[0]
+        return top.assign(Emissiefactor=emissiefactor, Footprint=top['Verbruik'] * emissiefactor)
+
+
+def model_for(state, source, streaming, factors, choices):
+    """Het ResultsModel van deze sessie voor `source`; nieuw alleen bij een ander bestand of andere modus."""
+    key = (source_key(source), streaming)
+    cached = state.get("results_model")
+    if cached is not None and cached[0] == key:
+        model = cached[1]
+        model.update(factors, choices)
+        return model
+    model = ResultsModel(load_consumption(source, streaming), factors, choices)
+    state["results_model"] = (key, model)
+    return model
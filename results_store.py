@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+DB_PATH = Path(os.environ.get("MAKITATOOL_RESULTS_DB", Path.home() / ".local" / "share" / "makitatool" / "resultaten.sqlite"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ingests (
+    file_hash TEXT NOT NULL,
+    site TEXT NOT NULL,
+    jaar INTEGER NOT NULL,
+    bestand TEXT,
+    ingested_at TEXT NOT NULL,
+    signature TEXT,
+    PRIMARY KEY (file_hash, site, jaar)
+);
+CREATE TABLE IF NOT EXISTS resultaten (
+    file_hash TEXT NOT NULL,
+    site TEXT NOT NULL,
+    jaar INTEGER NOT NULL,
+    onderdeel TEXT,
+    eenheid TEXT,
+    emissiefactor REAL,
+    verbruik REAL,
+    footprint REAL
+);
+CREATE INDEX IF NOT EXISTS idx_resultaten_site_jaar ON resultaten (site, jaar);
+CREATE INDEX IF NOT EXISTS idx_resultaten_jaar ON resultaten (jaar, footprint);
+CREATE TABLE IF NOT EXISTS omzet (
+    site TEXT NOT NULL,
+    jaar INTEGER NOT NULL,
+    omzet_miljoen REAL,
+    PRIMARY KEY (site, jaar)
+);
+"""
+
+
+def connect(path=DB_PATH):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    # Databases van vóór de handtekening: kolom toevoegen (bestaande regels tellen als verouderd)
+    if "signature" not in {r[1] for r in conn.execute("PRAGMA table_info(ingests)")}:
+        conn.execute("ALTER TABLE ingests ADD COLUMN signature TEXT")
+    return conn
+
+
+def is_ingested(file_hash, site, jaar, path=DB_PATH):
+    with closing(connect(path)) as conn:
+        row = conn.execute("SELECT 1 FROM ingests WHERE file_hash = ? AND site = ? AND jaar = ?", (file_hash, site, int(jaar))).fetchone()
+    return row is not None
+
+
+def rows_signature(rows):
+    """Handtekening van de resultaatregels: verandert met elke andere factor of keuze."""
+    payload = [[str(r['Onderdeel']), None if r['Eenheid'] is None else str(r['Eenheid']),
+                float(r['Emissiefactor']), float(r['Verbruik']), float(r['Footprint'])] for r in rows]
+    return hashlib.sha256(json.dumps(payload).encode()).hexdigest()
+
+
+def ingest(file_hash, site, jaar, rows, bestand=None, path=DB_PATH):
+    """Slaat de resultaatregels van één workbook op voor site/jaar.
+
+    Hetzelfde bestand met dezelfde uitkomst (zelfde hash, site, jaar en regels) is een no-op en
+    geeft False terug. Andere factoren of keuzes vervangen de regels van dit bestand; andere
+    bestanden voor dezelfde site/jaar blijven staan en tellen op.
+    """
+    jaar = int(jaar)
+    signature = rows_signature(rows)
+    with closing(connect(path)) as conn, conn:
+        if conn.execute("SELECT 1 FROM ingests WHERE file_hash = ? AND site = ? AND jaar = ? AND signature = ?",
+                        (file_hash, site, jaar, signature)).fetchone():
+            return False
+        conn.execute("DELETE FROM resultaten WHERE file_hash = ? AND site = ? AND jaar = ?", (file_hash, site, jaar))
+        conn.execute("DELETE FROM ingests WHERE file_hash = ? AND site = ? AND jaar = ?", (file_hash, site, jaar))
+        conn.execute(
+            "INSERT INTO ingests (file_hash, site, jaar, bestand, ingested_at, signature) VALUES (?, ?, ?, ?, ?, ?)",
+            (file_hash, site, jaar, bestand, datetime.now().isoformat(timespec="seconds"), signature),
+        )
+        conn.executemany(
+            "INSERT INTO resultaten (file_hash, site, jaar, onderdeel, eenheid, emissiefactor, verbruik, footprint) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [(file_hash, site, jaar, str(r['Onderdeel']), None if r['Eenheid'] is None else str(r['Eenheid']),
+              float(r['Emissiefactor']), float(r['Verbruik']), float(r['Footprint'])) for r in rows],
+        )
+    return True
+
+
+def workbooks(site, jaar, path=DB_PATH):
+    """Bestandsnamen van de workbooks die voor site/jaar zijn opgeslagen."""
+    with closing(connect(path)) as conn:
+        return [r[0] for r in conn.execute("SELECT bestand FROM ingests WHERE site = ? AND jaar = ? ORDER BY ingested_at", (site, int(jaar)))]
+
+
+def sites(path=DB_PATH):
+    with closing(connect(path)) as conn:
+        return [r[0] for r in conn.execute("SELECT DISTINCT site FROM ingests ORDER BY site")]
+
+
+def _site_filter(selected):
+    if not selected:
+        return "", []
+    return f" WHERE site IN ({','.join('?' * len(selected))})", list(selected)
+
+
+def yearly_series(selected=None, path=DB_PATH):
+    """Jaar, CO₂ (ton) en omzet (miljoen €) over de gekozen sites, direct uit de store.
+
+    Alleen site/jaren met een ingevulde omzet tellen mee, zodat CO₂ en omzet over dezelfde
+    sites gaan; jaren zonder enige omzet vallen weg.
+    """
+    where, params = _site_filter(selected)
+    with closing(connect(path)) as conn:
+        return pd.read_sql_query(
+            f"""
+            SELECT r.jaar AS "Jaar", SUM(o.omzet_miljoen) AS "Omzet (miljoenen)", SUM(r.co2) / 1000.0 AS "Co2-Footprint (ton)"
+            FROM (SELECT site, jaar, SUM(footprint) AS co2 FROM resultaten{where} GROUP BY site, jaar) r
+            JOIN omzet o ON o.site = r.site AND o.jaar = r.jaar
+            WHERE o.omzet_miljoen IS NOT NULL
+            GROUP BY r.jaar
+            ORDER BY r.jaar
+            """,
+            conn, params=params,
+        )
+
+
+def omzet_table(selected=None, path=DB_PATH):
+    """Per site/jaar uit de historie de opgeslagen omzet (leeg als nog niet ingevuld)."""
+    where, params = _site_filter(selected)
+    with closing(connect(path)) as conn:
+        return pd.read_sql_query(
+            f"""
+            SELECT i.site AS Site, i.jaar AS Jaar, o.omzet_miljoen AS "Omzet (miljoen €)"
+            FROM (SELECT DISTINCT site, jaar FROM ingests{where}) i
+            LEFT JOIN omzet o ON o.site = i.site AND o.jaar = i.jaar
+            ORDER BY i.site, i.jaar
+            """,
+            conn, params=params,
+        )
+
+
+def save_omzet(df, path=DB_PATH):
+    records = [(str(r.Site), int(r.Jaar), float(r.Omzet)) for r in df.rename(columns={"Omzet (miljoen €)": "Omzet"}).itertuples() if pd.notna(r.Omzet)]
+    with closing(connect(path)) as conn, conn:
+        conn.executemany("INSERT OR REPLACE INTO omzet (site, jaar, omzet_miljoen) VALUES (?, ?, ?)", records)
@@ -0,0 +1,68 @@
+import math
+
+import pandas as pd
+import streamlit as st
+
+PAGINA_GROOTTES = [25, 50, 100, 250]
+
+
+def render_table(table, factors, choices):
+    """Toont één pagina van de tabel; gewijzigde keuzes komen in `choices` en triggeren een rerun.
+
+    Elke bewerking zet de editor terug (nieuwe key): geldige keuzes komen via `choices` terug in
+    de tabel, ongeldige keuzes, leeggemaakte cellen en keuzes op vervoerregels verdwijnen.
+    """
+    nav = st.columns([1, 1, 4])
+    size = nav[0].selectbox("Regels per pagina", PAGINA_GROOTTES, index=1, key="tabel_grootte")
+    pages = max(1, math.ceil(len(table) / size))
+    page = nav[1].number_input(f"Pagina (van {pages})", min_value=1, max_value=pages, value=1, step=1, key="tabel_pagina")
+    start = (int(page) - 1) * size
+    # Alleen de zichtbare regels gaan naar de browser
+    visible = table.iloc[start:start + size]
+
+    # Afgewezen bewerkingen van de vorige rerun: melding tonen, de editor is al teruggezet
+    melding = st.session_state.pop("tabel_melding", None)
+    if melding:
+        st.warning(melding)
+
+    versie = st.session_state.get("tabel_editor_versie", 0)
+    options = ['Groen', 'Grijs'] + list(factors["brandstof_factors"].keys())
+    edited = st.data_editor(
+        visible[['Onderdeel', 'Keuze', 'Eenheid', 'Emissiefactor', 'Verbruik', 'Footprint']],
+        column_config={
+            'Keuze': st.column_config.SelectboxColumn("Stroomtype / brandstof", options=options),
+            'Emissiefactor': st.column_config.NumberColumn(format="%.3f"),
+            'Verbruik': st.column_config.NumberColumn(format="%.2f"),
+            'Footprint': st.column_config.NumberColumn(format="%.2f"),
+        },
+        disabled=['Onderdeel', 'Eenheid', 'Emissiefactor', 'Verbruik', 'Footprint'],
+        hide_index=True,
+        use_container_width=True,
+        key=f"tabel_editor_{versie}_{page}_{size}",
+    )
+
+    edits = False
+    meldingen = []
+    for idx, new in edited['Keuze'].items():
+        old = visible.at[idx, 'Keuze']
+        if new == old or (pd.isna(new) and pd.isna(old)):
+            continue
+        edits = True
+        sheet = visible.at[idx, 'Tabblad']
+        if pd.isna(old):
+            meldingen.append(f"Vervoerregels van tabblad '{sheet}' hebben geen keuze; de factor volgt uit het brandstoflabel.")
+            continue
+        if pd.isna(new):
+            # Leeggemaakte cel: de huidige keuze blijft staan
+            continue
+        allowed = ['Groen', 'Grijs'] if old in ('Groen', 'Grijs') else list(factors["brandstof_factors"].keys())
+        if new in allowed:
+            choices[sheet] = new
+        else:
+            meldingen.append(f"'{new}' is geen geldige keuze voor tabblad '{sheet}'.")
+    if edits:
+        # Nieuwe editor-key: geldige keuzes staan nu in `choices`, de rest wordt teruggedraaid
+        st.session_state["tabel_editor_versie"] = versie + 1
+        if meldingen:
+            st.session_state["tabel_melding"] = " ".join(dict.fromkeys(meldingen))
+        st.rerun()
@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+
+from co2_engine import choice_options
+from fuel_classifier import ELEK_KEY, classifier
+
+# Factor die niet gevarieerd wordt: vervoerlabels met een factor uit de factorindex.
+# Het 'verbruik' van dit slot is al de footprint, de factor is altijd 1.
+VAST = ('vast',)
+PERCENTIELEN = (5, 50, 95)
+# Bovengrens voor Monte Carlo: de footprint per scenario en tabblad is een dichte N x tabbladen-matrix
+MAX_SCENARIOS = 10000
+
+
+def slot_name(slot):
+    if slot == VAST:
+        return "Overig (factorindex, vast)"
+    if slot[0] == 'elekfactor':
+        return "Elektrisch vervoer"
+    if slot[0] == 'emission_factors':
+        return f"{slot[1]} · {slot[2]}"
+    return slot[1]
+
+
+def slot_factor(slot, factors):
+    if slot == VAST:
+        return 1.0
+    if slot[0] == 'elekfactor':
+        return float(factors["elekfactor"])
+    if slot[0] == 'emission_factors':
+        return float(factors["emission_factors"][slot[1]][slot[2]])
+    return float(factors["brandstof_factors"][slot[1]])
+
+
+def _sheet_slots(cons, factors, choice):
+    """{slot: verbruik} van één tabblad; de keuze wordt opgelost zoals in de calculator."""
+    if cons.kind == 'apparaten':
+        options = choice_options(cons.unit, factors)
+        if not options:
+            return {}
+        if choice not in options:
+            choice = options[0]
+        if cons.unit in factors["emission_factors"]:
+            return {('emission_factors', cons.unit, choice.lower()): cons.verbruik}
+        return {('brandstof_factors', choice): cons.verbruik}
+
+    slots = {}
+    classified = classifier.classify(cons.labels)
+    vaste_factoren = classifier.factors_for(classified, factors)
+    for key, verbruik, factor in zip(classified['FactorKey'], cons.label_verbruik, vaste_factoren):
+        if key == ELEK_KEY:
+            slot, waarde = ('elekfactor',), verbruik
+        elif key in factors["brandstof_factors"]:
+            slot, waarde = ('brandstof_factors', key), verbruik
+        else:
+            slot, waarde = VAST, verbruik * factor
+        slots[slot] = slots.get(slot, 0.0) + waarde
+    return slots
+
+
+class ScenarioModel:
+    """Verbruik per tabblad en factorslot als matrix; een scenario is een factorvector per slot.
+
+    Footprints van N scenario's in één matrixproduct: totals = F @ c, met F (N x slots).
+    """
+
+    def __init__(self, consumptions, factors, choices):
+        per_sheet = [(cons.sheet, _sheet_slots(cons, factors, choices.get(cons.sheet))) for cons in consumptions]
+        self.slots = sorted({slot for _, slots in per_sheet for slot in slots}, key=lambda s: (s == VAST, s))
+        self.sheets = [sheet for sheet, _ in per_sheet]
+        column = {slot: j for j, slot in enumerate(self.slots)}
+        self.matrix = np.zeros((len(self.sheets), len(self.slots)))
+        for i, (_, slots) in enumerate(per_sheet):
+            for slot, verbruik in slots.items():
+                self.matrix[i, column[slot]] = verbruik
+        self.consumption = self.matrix.sum(axis=0)
+        self.base = np.array([slot_factor(slot, factors) for slot in self.slots])
+
+    def evaluate(self, factor_matrix):
+        """Totale footprint per scenario (rij van `factor_matrix`)."""
+        return np.atleast_2d(factor_matrix) @ self.consumption
+
+    def evaluate_sheets(self, factor_matrix):
+        """Footprint per scenario en tabblad, (N x tabbladen)."""
+        return np.atleast_2d(factor_matrix) @ self.matrix.T
+
+    def ranges(self, pct):
+        """Standaardbereik per slot: huidige factor ± `pct` procent (het vaste slot varieert niet)."""
+        spread = np.where([slot == VAST for slot in self.slots], 0.0, np.abs(self.base) * pct / 100)
+        return pd.DataFrame({
+            'Factor': [slot_name(slot) for slot in self.slots],
+            'Huidig': self.base,
+            'Laag': self.base - spread,
+            'Hoog': self.base + spread,
+        })
+
+    def sample(self, ranges, n, seed=None):
+        """N factorvectoren, per slot uniform tussen Laag en Hoog van `ranges` (zelfde volgorde als self.slots)."""
+        rng = np.random.default_rng(seed)
+        # Leeggemaakte cellen vallen terug op de huidige factor
+        low = np.where(ranges['Laag'].isna(), self.base, ranges['Laag'].to_numpy(dtype=float))
+        high = np.maximum(np.where(ranges['Hoog'].isna(), self.base, ranges['Hoog'].to_numpy(dtype=float)), low)
+        return rng.uniform(low, high, size=(int(n), len(self.slots)))
+
+    def named(self, factors):
+        """Vaste scenario's: huidig, alles groen en alles grijs (alleen stroom/gas van apparaten verandert)."""
+        scenarios = {"Huidig": self.base}
+        for naam, keuze in (("Alles groen", 'groen'), ("Alles grijs", 'grijs')):
+            vector = self.base.copy()
+            for j, slot in enumerate(self.slots):
+                if slot[0] == 'emission_factors':
+                    vector[j] = factors["emission_factors"][slot[1]][keuze]
+            scenarios[naam] = vector
+        return scenarios
+
+
+def bands(values, q=PERCENTIELEN):
+    """Percentielen over de scenario's (as 0); per tabblad als `values` 2D is."""
+    return np.percentile(values, q, axis=0)
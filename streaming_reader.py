@@ -0,0 +1,168 @@
+import os
+import threading
+from io import BytesIO
+
+import pandas as pd
+
+from co2_engine import SheetConsumption, kind_for_columns, merge_top, row_verbruik, top_rows
+from worker_pool import fan_out, imap_completed, map_ordered
+from workbook_cache import read_bytes
+
+# Alleen deze kolommen worden ooit gebruikt; de rest wordt niet ingelezen
+NODIGE_KOLOMMEN = ['Aantal', 'Vermogen', 'Eenheid', 'Draaiuren p/j', 'Brandstof', 'Brandstof p/j', 'Merk', 'Type']
+CHUNK_ROWS = int(os.environ.get("MAKITATOOL_CHUNK_ROWS", "20000"))
+# Uploads groter dan dit (MB) worden standaard streamend verwerkt
+STREAMING_THRESHOLD_MB = float(os.environ.get("MAKITATOOL_STREAMING_THRESHOLD_MB", "20"))
+
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class _TransportTotals:
+    def __init__(self, sheet):
+        self.sheet = sheet
+        self.totals = {}
+        self.top = None
+
+    def add(self, chunk):
+        chunk = chunk.dropna(subset=['Brandstof'])
+        verbruik = pd.to_numeric(chunk['Brandstof p/j'], errors='coerce')
+        sums = verbruik.groupby(chunk['Brandstof'], sort=False).sum()
+        for label, value in sums.items():
+            # dict behoudt de volgorde van eerste voorkomen over alle chunks heen
+            self.totals[label] = self.totals.get(label, 0) + value
+        # Alleen de top-N regels blijven bewaard, niet de chunk zelf
+        self.top = merge_top(self.top, top_rows(chunk, 'vervoer', verbruik=verbruik))
+
+    def result(self):
+        return SheetConsumption(self.sheet, 'vervoer', labels=list(self.totals), label_verbruik=list(self.totals.values()), top=self.top)
+
+
+class _EquipmentTotals:
+    def __init__(self, sheet):
+        self.sheet = sheet
+        self.unit = None
+        self.verbruik = 0.0
+        self.top = None
+
+    def add(self, chunk):
+        if self.unit is None:
+            eenheden = chunk['Eenheid'].dropna()
+            if not eenheden.empty:
+                self.unit = eenheden.iloc[0]
+        product = row_verbruik(chunk, 'apparaten')
+        self.verbruik += product.sum()
+        self.top = merge_top(self.top, top_rows(chunk, 'apparaten', verbruik=product))
+
+    def result(self):
+        return SheetConsumption(self.sheet, 'apparaten', unit=self.unit, verbruik=self.verbruik, top=self.top)
+
+
+def _sheet_consumption(ws, chunk_rows, on_rows=None):
+    # Aantal rijen volgens de dimensie-tag (kan ontbreken); alleen voor voortgangsmeldingen
+    total = getattr(ws, "max_row", None)
+    ws.reset_dimensions()
+    rows = ws.iter_rows(values_only=True)
+    header = next(rows, None)
+    if header is None:
+        return None
+    kind = kind_for_columns(header)
+    if kind is None:
+        return None
+
+    # Kolomprojectie: eerste kolom met de naam telt, zoals bij pandas
+    positions = {}
+    for i, name in enumerate(header):
+        if name in NODIGE_KOLOMMEN and name not in positions:
+            positions[name] = i
+    names = list(positions)
+    idx = list(positions.values())
+    totals = _TransportTotals(ws.title) if kind == 'vervoer' else _EquipmentTotals(ws.title)
+
+    done = 0
+    for chunk in _chunks(rows, chunk_rows):
+        projected = [[row[i] if i < len(row) else None for i in idx] for row in chunk]
+        totals.add(pd.DataFrame(projected, columns=names))
+        done += len(chunk)
+        if on_rows is not None:
+            on_rows(done, total - 1 if total else None)
+    result = totals.result()
+    result.rows = done
+    return result
+
+
+_worker = threading.local()
+
+
+def _init_stream_worker(data):
+    from openpyxl import load_workbook as open_workbook
+
+    _worker.wb = open_workbook(BytesIO(data), read_only=True, data_only=True)
+
+
+def _stream_sheet(args):
+    name, chunk_rows = args
+    return _sheet_consumption(_worker.wb[name], chunk_rows)
+
+
+def stream_consumption(source, chunk_rows=CHUNK_ROWS, workers=None):
+    """Leest een workbook rij voor rij (read-only) en geeft per herkend tabblad een SheetConsumption.
+
+    Het geheugengebruik per worker hangt af van `chunk_rows`, niet van het aantal rijen in het bestand.
+    Tabbladen worden over `workers` verdeeld; de volgorde blijft die van het workbook.
+    Niet gecachet: de app bewaart het resultaat via results_model in de gedeelde store.
+    """
+    data = read_bytes(source)
+
+    from openpyxl import load_workbook as open_workbook
+
+    wb = open_workbook(BytesIO(data), read_only=True, data_only=True)
+    try:
+        if not fan_out(workers, len(wb.worksheets), len(data)):
+            parts = [_sheet_consumption(ws, chunk_rows) for ws in wb.worksheets]
+        else:
+            parts = map_ordered(_stream_sheet, [(ws.title, chunk_rows) for ws in wb.worksheets], workers,
+                                initializer=_init_stream_worker, initargs=(data,))
+    finally:
+        wb.close()
+    return [c for c in parts if c is not None]
+
+
+def iter_sheets(data, chunk_rows=CHUNK_ROWS, workers=None, on_rows=None, on_names=None):
+    """Levert (positie, SheetConsumption of None) per tabblad zodra het klaar is.
+
+    Het workbook wordt één keer geopend; `on_names(tabbladen)` krijgt de namen vóór het eerste tabblad.
+    Sequentieel meldt `on_rows(positie, rijen, totaal)` de voortgang per chunk; in een
+    worker-pool komt alleen het resultaat per tabblad terug.
+    """
+    from openpyxl import load_workbook as open_workbook
+
+    wb = open_workbook(BytesIO(data), read_only=True, data_only=True)
+    try:
+        names = list(wb.sheetnames)
+        if on_names is not None:
+            on_names(names)
+        if not fan_out(workers, len(names), len(data)):
+            for i, name in enumerate(names):
+                report = None if on_rows is None else (lambda done, total, i=i: on_rows(i, done, total))
+                yield i, _sheet_consumption(wb[name], chunk_rows, report)
+            return
+    finally:
+        wb.close()
+    yield from imap_completed(_stream_sheet, [(name, chunk_rows) for name in names], workers,
+                              initializer=_init_stream_worker, initargs=(data,))
+
+
+def use_streaming(source):
+    size = getattr(source, "size", None)
+    if size is None:
+        size = len(read_bytes(source))
+    return size > STREAMING_THRESHOLD_MB * 1024 * 1024
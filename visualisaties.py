@@ -0,0 +1,21 @@
+from co2_engine import TOP_ROWS
+
+TITELS = {
+    'vervoer': "Top 5 hoogste brandstofverbruik",
+    'apparaten': "Top 5 hoogste verbruik per apparaat",
+}
+
+
+def tab_summary(model, cons, n=TOP_ROWS):
+    """Titel en top `n` van één tabblad, uit hetzelfde ResultsModel als de calculator."""
+    top = model.top_rows(cons.sheet, n)
+    if cons.kind == 'vervoer':
+        top = top.rename(columns={'Verbruik': 'Verbruik (L)'})
+    return {
+        'titel': TITELS[cons.kind],
+        'top5': top,
+    }
+
+
+def workbook_summaries(model, n=TOP_ROWS):
+    return {cons.sheet: tab_summary(model, cons, n) for cons in model.consumptions}
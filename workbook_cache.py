@@ -0,0 +1,172 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from io import BytesIO
+
+import pandas as pd
+
+from memory_store import store
+from worker_pool import fan_out, imap_completed, map_ordered
+
+class LRUCache:
+    """Thread-veilige cache met een vast aantal plekken; de minst recent gebruikte valt eruit."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max(1, int(max_entries))
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+# Geparste werkmappen en ruwe uploads staan in de gedeelde store, begrensd in bytes
+_workbooks = store.namespace("werkmappen")
+_uploads = store.namespace("uploads")
+# file_id van een Streamlit-upload -> inhoudshash, zodat een rerun niet opnieuw hasht
+_upload_hashes = LRUCache(256)
+
+
+class UploadEvicted(LookupError):
+    """De ruwe upload is uit de gedeelde store verwijderd; de gebruiker moet opnieuw uploaden."""
+
+
+@dataclass(frozen=True)
+class UploadHandle:
+    """Kleine verwijzing naar een upload in de gedeelde store; dit is wat in session_state staat."""
+    key: str
+    name: str
+    size: int
+    file_id: str = None
+
+    def available(self):
+        return self.key in _uploads
+
+    def getvalue(self):
+        data = _uploads.get(self.key)
+        if data is None:
+            raise UploadEvicted(self.name)
+        return data
+
+
+def store_upload(uploaded):
+    """Zet een Streamlit-upload één keer (per inhoud) in de gedeelde store en geeft een handle terug.
+
+    getvalue() van een ongelezen UploadedFile geeft dezelfde bytes terug die Streamlit vasthoudt
+    (geen kopie); de aanroeper laat Streamlit's verwijzing daarna los, zodat alleen de store ze houdt.
+    """
+    data = read_bytes(uploaded)
+    key = source_key(uploaded)
+    if not _uploads.put(key, data):
+        raise MemoryError(f"'{uploaded.name}' ({len(data) / 2**20:,.0f} MB) is groter dan het geheugenbudget "
+                          f"({store.budget / 2**20:,.0f} MB).")
+    return UploadHandle(key, uploaded.name, len(data), getattr(uploaded, "file_id", None))
+
+
+def read_bytes(source):
+    # Streamlit UploadedFile, bytes, bestandspad of file-object
+    if isinstance(source, (bytes, bytearray)):
+        return bytes(source)
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as fh:
+            return fh.read()
+    if hasattr(source, "getvalue"):
+        return source.getvalue()
+    source.seek(0)
+    return source.read()
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def source_key(source):
+    if isinstance(source, UploadHandle):
+        return source.key
+    file_id = getattr(source, "file_id", None)
+    if file_id is None:
+        return content_hash(read_bytes(source))
+    key = _upload_hashes.get(file_id)
+    if key is None:
+        key = content_hash(read_bytes(source))
+        _upload_hashes.put(file_id, key)
+    return key
+
+
+# Per worker (proces of thread) een eigen ExcelFile; openpyxl is niet thread-safe
+_worker = threading.local()
+
+
+def _init_parse_worker(data):
+    _worker.xl = pd.ExcelFile(BytesIO(data))
+
+
+def _parse_sheet(sheet):
+    return _worker.xl.parse(sheet)
+
+
+def parse_workbook(data, workers=None):
+    """Alle tabbladen als {tabblad: DataFrame}, in de oorspronkelijke volgorde; tabbladen parallel gedecodeerd."""
+    xl = pd.ExcelFile(BytesIO(data))
+    sheet_names = xl.sheet_names
+    if not fan_out(workers, len(sheet_names), len(data)):
+        return {sheet: xl.parse(sheet) for sheet in sheet_names}
+    frames = map_ordered(_parse_sheet, sheet_names, workers, initializer=_init_parse_worker, initargs=(data,))
+    return dict(zip(sheet_names, frames))
+
+
+def iter_sheets(data, workers=None, on_names=None):
+    """Zoals parse_workbook, maar levert (positie, DataFrame) per tabblad zodra het gedecodeerd is.
+
+    Het workbook wordt één keer geopend; `on_names(tabbladen)` krijgt de namen vóór het eerste tabblad.
+    """
+    xl = pd.ExcelFile(BytesIO(data))
+    try:
+        names = xl.sheet_names
+        if on_names is not None:
+            on_names(names)
+        if not fan_out(workers, len(names), len(data)):
+            for i, sheet in enumerate(names):
+                yield i, xl.parse(sheet)
+            return
+    finally:
+        xl.close()
+    yield from imap_completed(_parse_sheet, names, workers, initializer=_init_parse_worker, initargs=(data,))
+
+
+def load_workbook(source):
+    """Geeft {tabblad: DataFrame} terug; elke inhoud wordt maar één keer geparst.
+
+    De DataFrames worden gedeeld tussen pagina's, reruns en sessies: niet muteren.
+    """
+    key = source_key(source)
+    sheets = _workbooks.get(key)
+    if sheets is None:
+        sheets = parse_workbook(read_bytes(source))
+        _workbooks.put(key, sheets)
+    return sheets
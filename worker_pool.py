@@ -0,0 +1,89 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+# Aantal workers voor het inlezen/aggregeren van tabbladen; 1 = sequentieel
+WORKERS = int(os.environ.get("MAKITATOOL_WORKERS", "0")) or (os.cpu_count() or 1)
+# 'process' (parallel decoderen, geen GIL) of 'thread'
+POOL_KIND = os.environ.get("MAKITATOOL_POOL", "process")
+# Startmethode van procespools. Nooit 'fork': de Streamlit-server is multithreaded en
+# inleesjobs starten hun pool vanuit een achtergrondthread (kans op deadlocks)
+START_METHOD = os.environ.get("MAKITATOOL_START_METHOD", "forkserver")
+# Kleinere werkmappen blijven standaard sequentieel: elke worker opent de hele werkmap opnieuw
+PARALLEL_MIN_MB = float(os.environ.get("MAKITATOOL_PARALLEL_MIN_MB", "2"))
+# Modules die de forkserver vooraf importeert, zodat een nieuwe worker niet opnieuw pandas/openpyxl laadt
+PRELOAD = ["workbook_cache", "streaming_reader"]
+
+_context_lock = threading.Lock()
+_context = None
+
+
+def resolve_workers(workers=None):
+    return max(1, WORKERS if workers is None else int(workers))
+
+
+def fan_out(workers, n_items, size=None):
+    """True als `n_items` over meerdere workers verdeeld moeten worden.
+
+    Een expliciet aantal workers wordt gevolgd; standaard alleen voor werkmappen vanaf
+    PARALLEL_MIN_MB (`size` in bytes), omdat het opstarten van de workers en het opnieuw
+    openen van de werkmap bij kleine bestanden meer kost dan het oplevert.
+    """
+    if n_items < 2 or resolve_workers(workers) <= 1:
+        return False
+    return workers is not None or size is None or size >= PARALLEL_MIN_MB * 2**20
+
+
+def mp_context():
+    global _context
+    with _context_lock:
+        if _context is None:
+            method = START_METHOD if START_METHOD in multiprocessing.get_all_start_methods() else "spawn"
+            _context = multiprocessing.get_context(method)
+            if method == "forkserver":
+                _context.set_forkserver_preload(PRELOAD)
+        return _context
+
+
+def _executor(kind, workers, initializer, initargs):
+    if (kind or POOL_KIND) == "process":
+        return ProcessPoolExecutor(max_workers=workers, mp_context=mp_context(), initializer=initializer, initargs=initargs)
+    return ThreadPoolExecutor(max_workers=workers, initializer=initializer, initargs=initargs)
+
+
+def map_ordered(fn, items, workers=None, initializer=None, initargs=(), kind=None):
+    """Past `fn` toe op alle items in een worker-pool; de uitkomsten staan in de volgorde van `items`.
+
+    Met één worker (of één item) draait alles sequentieel in dit proces, met dezelfde uitkomst.
+    """
+    items = list(items)
+    workers = min(resolve_workers(workers), len(items))
+    if workers <= 1:
+        if initializer is not None:
+            initializer(*initargs)
+        return [fn(item) for item in items]
+    with _executor(kind, workers, initializer, initargs) as pool:
+        return list(pool.map(fn, items))
+
+
+def imap_completed(fn, items, workers=None, initializer=None, initargs=(), kind=None):
+    """Zoals map_ordered, maar levert (positie, uitkomst) zodra een item klaar is.
+
+    Wordt de generator voortijdig gesloten, dan worden nog niet gestarte items geannuleerd.
+    """
+    items = list(items)
+    workers = min(resolve_workers(workers), len(items))
+    if workers <= 1:
+        if initializer is not None:
+            initializer(*initargs)
+        for i, item in enumerate(items):
+            yield i, fn(item)
+        return
+    pool = _executor(kind, workers, initializer, initargs)
+    try:
+        futures = {pool.submit(fn, item): i for i, item in enumerate(items)}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)